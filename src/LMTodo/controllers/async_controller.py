@@ -0,0 +1,118 @@
+"""Asyncio versions of the todo_controller functions.
+
+Each coroutine runs its todo_controller counterpart on a small pool of
+database threads, so awaiting one never blocks the event loop. Every
+query on those threads checks out its own reader connection (and WAL
+snapshot), so concurrent reads do not wait for each other; writes still
+queue on TodoDB's writer thread.
+
+Cancelling the awaiting task, directly or through asyncio.wait_for,
+interrupts the running query. Qt code can await these through
+qthread_helper.AsyncRunner.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from LMTodo.controllers import todo_controller
+from LMTodo.models.cancellation import CancelToken, activate
+
+MAX_THREADS = 8  # Controller calls running at once
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                MAX_THREADS, thread_name_prefix="TodoDB async"
+            )
+        return _executor
+
+
+def _call(token, func, args, kwargs):
+    token.check()  # Cancelled while queued
+    token.start_clock()
+    with activate(token):
+        return func(*args, **kwargs)
+
+
+async def run(func, *args, timeout=None, **kwargs):
+    """Run a blocking function on the database threads and return its result.
+
+    timeout is in seconds and counts from when the function starts running;
+    past it the call raises TimeoutError.
+    """
+    token = CancelToken(timeout)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_executor(), functools.partial(_call, token, func, args, kwargs)
+        )
+    except asyncio.CancelledError:
+        token.cancel()  # Interrupts the query if it already started
+        raise
+
+
+def shutdown(wait=True):
+    """Stop the database threads (e.g. before close_db); they restart on next use."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _wrap(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+
+    return wrapper
+
+
+init_db = _wrap(todo_controller.init_db)
+close_db = _wrap(todo_controller.close_db)
+load_startup_data = _wrap(todo_controller.load_startup_data)
+
+
+### Project Management
+get_projects = _wrap(todo_controller.get_projects)
+add_project = _wrap(todo_controller.add_project)
+edit_project = _wrap(todo_controller.edit_project)
+delete_project = _wrap(todo_controller.delete_project)
+
+
+### Task Management
+get_tasks = _wrap(todo_controller.get_tasks)
+get_tasks_page = _wrap(todo_controller.get_tasks_page)
+get_tasks_rev = _wrap(todo_controller.get_tasks_rev)
+get_tasks_changed_since = _wrap(todo_controller.get_tasks_changed_since)
+search_tasks = _wrap(todo_controller.search_tasks)
+add_task = _wrap(todo_controller.add_task)
+edit_task = _wrap(todo_controller.edit_task)
+delete_task = _wrap(todo_controller.delete_task)
+update_task_status = _wrap(todo_controller.update_task_status)
+add_tasks = _wrap(todo_controller.add_tasks)
+delete_tasks = _wrap(todo_controller.delete_tasks)
+move_tasks = _wrap(todo_controller.move_tasks)
+update_task_status_many = _wrap(todo_controller.update_task_status_many)
+update_task_comments = _wrap(todo_controller.update_task_comments)
+update_task_comments_many = _wrap(todo_controller.update_task_comments_many)
+
+
+### Attachments
+get_attachments = _wrap(todo_controller.get_attachments)
+add_attachment = _wrap(todo_controller.add_attachment)
+read_attachment = _wrap(todo_controller.read_attachment)
+save_attachment = _wrap(todo_controller.save_attachment)
+delete_attachment = _wrap(todo_controller.delete_attachment)
+sweep_attachments = _wrap(todo_controller.sweep_attachments)
+
+
+### Export
+export_tasks_csv = _wrap(todo_controller.export_tasks_csv)
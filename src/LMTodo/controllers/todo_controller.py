@@ -1,3 +1,8 @@
+import csv
+from datetime import date
+
+from LMTodo.models.attachment_store import AttachmentStore, attachment_dir
+from LMTodo.models.process_worker import cpu_bound, report_progress
 from LMTodo.models.todo_db import TodoDB
 
 
@@ -9,6 +14,28 @@ def init_db(path="todo.db"):
     TodoDB.init_db(path)
 
 
+def load_startup_data(
+    path, default_project=None, task_filter="All", sort_method="creation", limit=100
+):
+    """Open the database and read what the main window shows first.
+
+    Returns (projects, project_id, (tasks, next_key), rev), where project_id is
+    that of the project named default_project (None if there is none) and
+    the first page of tasks is the one get_tasks_page returns for it.
+    """
+    init_db(path)
+    projects = get_projects()
+    project_id = next((pid for pid, name in projects if name == default_project), None)
+    rev = get_tasks_rev()
+    page = get_tasks_page(None, limit, task_filter, sort_method, project_id)
+    return projects, project_id, page, rev
+
+
+def close_db():
+    """Close the pooled database connections (e.g. on exit or before moving the file)."""
+    TodoDB.close()
+
+
 ### Project Management
 def get_projects():
     db = TodoDB()
@@ -31,17 +58,167 @@ def delete_project(project_id):
 
 
 ### Task Management
-def get_tasks(project_id=None):
-    db = TodoDB()
+TASK_COLUMNS = (
+    "id, title, status, creation_date, due_date, close_date, project_id, comments"
+)
+
+# SQL condition for each task filter shown in TaskFilterWidget; ":today" is
+# bound to the local date so On Time/Overdue match what the user sees.
+TASK_FILTERS = {
+    "All": "",
+    "On Time": "status = 'open' AND due_date >= :today",
+    "Overdue": "status = 'open' AND (due_date IS NULL OR due_date < :today)",
+    "Open": "status = 'open'",
+    "Finished": "status = 'complete'",
+    "Cancelled": "status = 'cancelled'",
+}
+
+# Sort key expressions for each sort method. Every key is non-NULL (tasks
+# without a due date sort last) and ends with id, so a row's key values are
+# unique and can be used as a keyset pagination cursor. The task indexes of
+# todo_db migration 7 repeat these expressions; keep them in sync.
+TASK_SORT_KEYS = {
+    "creation": ("id",),
+    "due": ("IFNULL(due_date, '9999-12-31')", "id"),
+    "status": (
+        "CASE status WHEN 'open' THEN 0 WHEN 'complete' THEN 1 ELSE 2 END",
+        "id",
+    ),
+}
+
+
+def task_sort_key(task, sort_method):
+    """Return the TASK_SORT_KEYS values of a task row, computed in Python."""
+    task_id, _title, status, _created, due_date = task[:5]
+    if sort_method == "due":
+        return (due_date or "9999-12-31", task_id)
+    if sort_method == "status":
+        return ({"open": 0, "complete": 1}.get(status, 2), task_id)
+    return (task_id,)
+
+
+def _task_query_parts(project_id, task_filter, sort_method):
+    """Return the WHERE conditions, params and sort keys for a task query."""
+    conditions = []
+    params = {"today": date.today().isoformat(), "project_id": project_id}
     if project_id:
-        return db.fetch_all(
-            "SELECT id, title, status, creation_date, due_date, close_date, project_id, comments FROM tasks WHERE project_id=?",
-            (project_id,),
-        )
-    else:
-        return db.fetch_all(
-            "SELECT id, title, status, creation_date, due_date, close_date, project_id, comments FROM tasks"
-        )
+        conditions.append("project_id = :project_id")
+    if TASK_FILTERS.get(task_filter):
+        conditions.append(TASK_FILTERS[task_filter])
+    sort_keys = TASK_SORT_KEYS.get(sort_method, TASK_SORT_KEYS["creation"])
+    return conditions, params, sort_keys
+
+
+def get_tasks(project_id=None, task_filter="All", sort_method="creation"):
+    """Return the tasks matching project and filter, ordered by sort_method."""
+    db = TodoDB()
+    conditions, params, sort_keys = _task_query_parts(
+        project_id, task_filter, sort_method
+    )
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return db.fetch_all(
+        f"SELECT {TASK_COLUMNS} FROM tasks{where} ORDER BY {', '.join(sort_keys)}",
+        params,
+    )
+
+
+def get_tasks_page(
+    after_key=None,
+    limit=100,
+    task_filter="All",
+    sort_method="creation",
+    project_id=None,
+):
+    """Return one page of tasks and the cursor for the next one.
+
+    Pass the returned key back as after_key to continue after the last row;
+    the key is None once there are no more rows. The indexes of migration 7
+    return the rows in sort order, so a page reads about limit rows whatever
+    the table size or how many pages came before it. On Time is the exception:
+    its due date range is searched and only the open tasks due from today on
+    are sorted.
+    """
+    db = TodoDB()
+    conditions, params, sort_keys = _task_query_parts(
+        project_id, task_filter, sort_method
+    )
+    if after_key is not None:
+        placeholders = ", ".join(f":key{i}" for i in range(len(sort_keys)))
+        conditions.append(f"({', '.join(sort_keys)}) > ({placeholders})")
+        params.update({f"key{i}": value for i, value in enumerate(after_key)})
+    params["limit"] = limit
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = db.fetch_all(
+        f"SELECT {TASK_COLUMNS}, {', '.join(sort_keys)} FROM tasks{where}"
+        f" ORDER BY {', '.join(sort_keys)} LIMIT :limit",
+        params,
+    )
+    n_columns = len(TASK_COLUMNS.split(","))
+    tasks = [row[:n_columns] for row in rows]
+    next_key = tuple(rows[-1][n_columns:]) if len(rows) == limit else None
+    return tasks, next_key
+
+
+def get_tasks_rev():
+    """Return the revision of the latest task change, for get_tasks_changed_since."""
+    db = TodoDB()
+    return db.fetch_all("SELECT IFNULL(MAX(rev), 0) FROM task_changes")[0][0]
+
+
+def get_tasks_changed_since(rev, project_id=None, task_filter="All"):
+    """Return the tasks added, edited or deleted after rev, and the new revision.
+
+    The result is (changes, rev) where changes is a list of (task_id, task)
+    in change order. task is None when the task was deleted or no longer
+    matches project and filter, and the TASK_COLUMNS row otherwise.
+    """
+    db = TodoDB()
+    conditions, params, _sort_keys = _task_query_parts(
+        project_id, task_filter, "creation"
+    )
+    params["rev"] = rev
+    visible = " AND ".join(conditions) or "1"
+    columns = ", ".join(f"tasks.{column.strip()}" for column in TASK_COLUMNS.split(","))
+    rows = db.fetch_all(
+        f"SELECT task_changes.rev, task_changes.task_id, task_changes.deleted,"
+        f" IFNULL({visible}, 0), {columns} FROM task_changes"
+        " LEFT JOIN tasks ON tasks.id = task_changes.task_id"
+        " WHERE task_changes.rev > :rev ORDER BY task_changes.rev",
+        params,
+    )
+    # Each row is rev, task_id, deleted, visible and then the task columns
+    changes = [(row[1], None if row[2] or not row[3] else row[4:]) for row in rows]
+    return changes, (rows[-1][0] if rows else rev)
+
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+
+def search_tasks(text, project_id=None, task_filter="All", limit=200):
+    """Return the tasks matching text in title or comments, best match first.
+
+    Rows are the TASK_COLUMNS followed by a snippet of the matching text with
+    the matched words wrapped in <b></b>. Title matches rank above comment
+    matches.
+    """
+    db = TodoDB()
+    if not text.split():
+        return []
+    conditions, params, _sort_keys = _task_query_parts(
+        project_id, task_filter, "creation"
+    )
+    conditions.insert(0, "tasks_fts MATCH :match")
+    params.update({"match": _fts_query(text), "limit": limit})
+    columns = ", ".join(f"tasks.{column.strip()}" for column in TASK_COLUMNS.split(","))
+    return db.fetch_all(
+        f"SELECT {columns}, snippet(tasks_fts, -1, '<b>', '</b>', '…', 12)"
+        " FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid"
+        f" WHERE {' AND '.join(conditions)}"
+        " ORDER BY bm25(tasks_fts, 10.0, 1.0) LIMIT :limit",
+        params,
+    )
 
 
 def add_task(description, due_date, project_id):
@@ -79,7 +256,133 @@ def update_task_status(task_id, new_status):
         )
 
 
+def add_tasks(tasks):
+    """Insert several (description, due_date, project_id) tasks in one commit."""
+    db = TodoDB()
+    db.persist_many(
+        "INSERT INTO tasks (title, status, creation_date, due_date, close_date, project_id) VALUES (?, 'open', DATE('now'), ?, NULL, ?)",
+        [
+            (description, due_date, project_id)
+            for description, due_date, project_id in tasks
+        ],
+    )
+
+
+def delete_tasks(task_ids):
+    """Delete several tasks in one commit."""
+    db = TodoDB()
+    db.persist_many("DELETE FROM tasks WHERE id=?", [(tid,) for tid in task_ids])
+
+
+def move_tasks(task_ids, project_id):
+    """Move several tasks to another project in one commit."""
+    db = TodoDB()
+    db.persist_many(
+        "UPDATE tasks SET project_id=? WHERE id=?",
+        [(project_id, tid) for tid in task_ids],
+    )
+
+
+def update_task_status_many(task_ids, new_status):
+    """Set the status of several tasks in one commit (see update_task_status)."""
+    db = TodoDB()
+    if new_status in ["complete", "cancelled"]:
+        db.persist_many(
+            "UPDATE tasks SET status=?, close_date=DATE('now') WHERE id=?",
+            [(new_status, tid) for tid in task_ids],
+        )
+    else:
+        db.persist_many(
+            "UPDATE tasks SET status='open', close_date=NULL WHERE id=?",
+            [(tid,) for tid in task_ids],
+        )
+
+
 def update_task_comments(task_id, comments):
     """Persist comments for a task."""
     db = TodoDB()
     db.persist("UPDATE tasks SET comments=? WHERE id=?", (comments, task_id))
+
+
+def update_task_comments_many(comments):
+    """Persist the comments of several tasks, given as {task_id: comments}, in one commit."""
+    db = TodoDB()
+    db.persist_many(
+        "UPDATE tasks SET comments=? WHERE id=?",
+        [(text, task_id) for task_id, text in comments.items()],
+    )
+
+
+### Attachments
+def get_attachments(task_id):
+    """Return (id, filename, size) for each attachment of a task, without its data."""
+    return AttachmentStore().list_for_task(task_id)
+
+
+def add_attachment(task_id, file_path):
+    """Attach a file to a task and return the attachment id.
+
+    Identical contents are stored only once, however many tasks they are
+    attached to.
+    """
+    return AttachmentStore().add(task_id, file_path)
+
+
+def read_attachment(file_id, offset, length):
+    """Return length bytes of an attachment starting at offset.
+
+    Use save_attachment for the whole content; it is streamed to disk.
+    """
+    return b"".join(AttachmentStore().iter_content(file_id, offset, length))
+
+
+def save_attachment(file_id, dest_path):
+    """Stream an attachment to a file on disk."""
+    with open(dest_path, "wb") as out:
+        for chunk in AttachmentStore().iter_content(file_id):
+            out.write(chunk)
+
+
+def delete_attachment(file_id):
+    AttachmentStore().remove(file_id)
+
+
+def sweep_attachments():
+    """Remove attachment contents no task refers to any more."""
+    return AttachmentStore().sweep_orphans()
+
+
+def set_attachment_sidecar_min_size(size):
+    """Store attachments of at least size bytes next to the database (None: never)."""
+    AttachmentStore.SIDECAR_MIN_SIZE = size
+
+
+### Export
+EXPORT_PAGE_SIZE = 1000
+
+
+@cpu_bound
+def export_tasks_csv(dest_path, project_id=None):
+    """Write the tasks (of one project, if given) to a CSV file and return how many.
+
+    Runs in a worker process (see ProcessRunner). Tasks are read one page at
+    a time, and progress is reported after each page.
+    """
+    db = TodoDB()
+    where, params = ("WHERE project_id=?", (project_id,)) if project_id else ("", ())
+    total = db.fetch_all(f"SELECT COUNT(*) FROM tasks {where}", params)[0][0]
+    written = 0
+    after_key = None
+    with open(dest_path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        writer.writerow(column.strip() for column in TASK_COLUMNS.split(","))
+        while True:
+            tasks, after_key = get_tasks_page(
+                after_key, EXPORT_PAGE_SIZE, "All", "creation", project_id
+            )
+            writer.writerows(tasks)
+            written += len(tasks)
+            report_progress(written, total)
+            if after_key is None:
+                break
+    return written
@@ -1,4 +1,5 @@
 import base64
+import multiprocessing
 import sys
 
 from PySide6.QtCore import QByteArray, QRect
@@ -9,14 +10,18 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QListWidget,
     QMainWindow,
+    QMessageBox,
     QPushButton,
     QVBoxLayout,
     QWidget,
 )
 
-from LMTodo.controllers import todo_controller
+from LMTodo.controllers import async_controller, todo_controller
+from LMTodo.models.db_watcher import DatabaseWatcher
+from LMTodo.models.job_metrics import job_metrics
 from LMTodo.models.parser import TodoConfigParser
-from LMTodo.models.qthread_helper import ThreadRunner
+from LMTodo.models.qthread_helper import AsyncRunner, ProcessRunner, ThreadRunner
+from LMTodo.views.debug_panel import JobMetricsDialog
 from LMTodo.views.lmtodo_icons import base64_app_icon
 from LMTodo.views.settings_panel import SettingsPanel
 from LMTodo.views.task_panel import TaskPanel
@@ -29,8 +34,23 @@ class MainWindow(QMainWindow):
 
     def __init__(self):
         self.tasks = []
+        self.projects = []
         self.configs = TodoConfigParser()
-        todo_controller.init_db(self.configs.db_path)
+        todo_controller.set_attachment_sidecar_min_size(
+            self.configs.get_attachment_sidecar_min_size()
+        )
+
+        # Open the database and read the projects and the first page of tasks
+        # while the widgets below are built. The path is set right away, so
+        # no query can reach another database meanwhile.
+        todo_controller.update_db_path(self.configs.db_path)
+        self._startup_query = tuple(
+            self.configs.get(
+                "General", option, fallback=self.configs.DEFAULTS["General"][option]
+            )
+            for option in ("default_project", "default_filter", "default_sort")
+        )
+        self.load_startup_data()
 
         super().__init__()
 
@@ -123,16 +143,120 @@ class MainWindow(QMainWindow):
         self.config_panel.hide()
         self.main_layout.insertWidget(1, self.config_panel)
 
-        # Load Projects
-        self.load_projects()
+        # Projects are loaded by the startup job; reloads wait for it, and
+        # the controls stay disabled until the schema is up to date
+        self._projects_loading = True
+        self._projects_reload_pending = False
+        self.set_controls_enabled(False)
+
+        # Pick up changes other instances make to a shared database
+        self.db_watcher = DatabaseWatcher()
+        self.db_watcher.tables_changed.connect(self.on_external_change)
 
         # Set shortcuts
         self.set_shortcuts()
 
+        # Hidden debug panel with background job timings; not configurable
+        self.job_metrics_dialog = None
+        self.job_metrics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+F12"), self)
+        self.job_metrics_shortcut.activated.connect(self.show_job_metrics)
+
+    def show_job_metrics(self):
+        if self.job_metrics_dialog is None:
+            self.job_metrics_dialog = JobMetricsDialog(self)
+        self.job_metrics_dialog.show()
+        self.job_metrics_dialog.raise_()
+
+    def load_startup_data(self):
+        ThreadRunner(
+            todo_controller.load_startup_data,
+            self.on_startup_data_loaded,
+            self.configs.db_path,
+            *self._startup_query,
+            TaskPanel.PAGE_SIZE,
+            error_callback=self.on_startup_failed,
+        ).start()
+
+    def set_controls_enabled(self, enabled):
+        self.project_panel.setEnabled(enabled)
+        self.task_panel.setEnabled(enabled)
+
+    def on_startup_data_loaded(self, result):
+        projects, project_id, page, rev = result
+        self._projects_loading = False
+        self.set_controls_enabled(True)
+        if self._projects_reload_pending:
+            self._projects_reload_pending = False
+            self.load_projects()
+        else:
+            self.project_list.blockSignals(True)
+            self._show_projects(projects)
+            self.project_list.blockSignals(False)
+            self.set_projects_buttons_state()
+            _default_project, task_filter, sort_method = self._startup_query
+            self.task_panel.show_loaded_tasks(
+                (project_id, task_filter, sort_method, ""), page, rev
+            )
+
+        # Drop attachment contents left unreferenced by earlier deletes
+        AsyncRunner(async_controller.sweep_attachments).start()
+        self.db_watcher.start()
+
+    def on_startup_failed(self, error):
+        reply = QMessageBox.critical(
+            self,
+            translate("Error"),
+            f"{translate('Failed to open the database')}: {error}",
+            QMessageBox.Retry | QMessageBox.Close,
+        )
+        if reply == QMessageBox.Retry:
+            self.load_startup_data()
+        else:
+            self.close()
+
     def load_projects(self, result=None):
-        ThreadRunner(todo_controller.get_projects, self.on_projects_loaded).start()
+        """Reload the project list, queueing at most one reload behind a running one."""
+        if self._projects_loading:
+            self._projects_reload_pending = True
+            return
+        self._projects_loading = True
+        ThreadRunner(
+            todo_controller.get_projects,
+            self.on_projects_loaded,
+            error_callback=self.on_projects_load_failed,
+        ).start()
+
+    def on_projects_load_failed(self, error):
+        self._projects_loading = False
+        QMessageBox.critical(
+            self,
+            translate("Error"),
+            f"{translate('Failed to load projects')}:\n{error}",
+        )
+        if self._projects_reload_pending:
+            self._projects_reload_pending = False
+            self.load_projects()
+
+    def on_external_change(self, tables):
+        """Refresh only what another instance changed."""
+        if "projects" in tables:
+            self.load_projects()  # Reloads the tasks as well
+        elif "tasks" in tables:
+            self.task_panel.sync_tasks()
 
     def on_projects_loaded(self, projects):
+        self._projects_loading = False
+        if self._projects_reload_pending:
+            # Superseded by a reload requested while this one ran
+            self._projects_reload_pending = False
+            self.load_projects()
+            return
+        self._show_projects(projects)
+        self.set_projects_buttons_state()
+        self.task_panel.load_tasks()
+
+    def _show_projects(self, projects):
+        """Fill the project list, keeping the selection or selecting the default."""
         # Store the ID of the currently selected project
         prev_project_id = None
         if self.project_list.selectedIndexes():
@@ -172,12 +296,9 @@ class MainWindow(QMainWindow):
                     self.configs.set("General", "default_project", "All Projects")
                     self.configs.save()
 
-        self.set_projects_buttons_state()
-        self.task_panel.load_tasks()
-
     def on_project_selected(self):
         self.set_projects_buttons_state()
-        self.task_panel.display_filtered_tasks()
+        self.task_panel.load_tasks()
 
     def set_projects_buttons_state(self):
         if not self.project_list.selectedIndexes():
@@ -432,10 +553,19 @@ class MainWindow(QMainWindow):
         self.configs.save_window_settings(
             geometry.width(), geometry.height(), geometry.x(), geometry.y()
         )
+        self.db_watcher.stop()
+        self.task_panel.flush_comments(block=True)
+        ThreadRunner.wait_for_done()
+        AsyncRunner.shutdown()
+        async_controller.shutdown()
+        ProcessRunner.shutdown()
+        todo_controller.close_db()
+        job_metrics.dump_if_requested()
         super().closeEvent(event)
 
 
 def main():
+    multiprocessing.freeze_support()  # ProcessRunner workers in frozen builds
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from LMTodo.models.cancellation import check_current
+from LMTodo.models.todo_db import TodoDB
+
+
+def attachment_dir(db_path) -> Path:
+    """Return the sidecar directory that holds large attachments of a database."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.name}.attachments")
+
+
+class AttachmentStore:
+    """Content-addressed attachment storage on top of the blobs/task_files tables.
+
+    Every distinct file content is stored once, keyed by its SHA-256 digest,
+    and shared by all the tasks it is attached to. Contents of at least
+    SIDECAR_MIN_SIZE bytes are kept as files in the sidecar directory instead
+    of inside the database (None keeps everything in the database). Without
+    TodoDB.HAS_BLOB_IO, contents above TodoDB.BLOB_CHUNK_SIZE always go to
+    the sidecar directory, as they cannot be streamed into a BLOB. Blobs no
+    longer attached to any task stay until sweep_orphans() removes them.
+    """
+
+    SIDECAR_MIN_SIZE: Optional[int] = 8 * 1024 * 1024
+
+    def __init__(self):
+        self.db = TodoDB()
+
+    @staticmethod
+    def _sidecar_path(digest: str) -> Path:
+        return attachment_dir(TodoDB.DB_PATH) / digest[:2] / digest
+
+    @staticmethod
+    def _hash_file(path: Path) -> Tuple[str, int]:
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as stream:
+            while chunk := stream.read(TodoDB.BLOB_CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size
+
+    def _copy_to_sidecar(self, path: Path, digest: str) -> None:
+        target = self._sidecar_path(digest)
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, target)
+
+    def add(self, task_id: int, file_path) -> int:
+        """Attach a file to a task, storing its content only if it is new."""
+        path = Path(file_path)
+        digest, size = self._hash_file(path)
+        in_sidecar = (
+            self.SIDECAR_MIN_SIZE is not None and size >= self.SIDECAR_MIN_SIZE
+        ) or (not TodoDB.HAS_BLOB_IO and size > TodoDB.BLOB_CHUNK_SIZE)
+        if in_sidecar:
+            # Copy outside the write lock; re-checked below in case a sweep ran
+            self._copy_to_sidecar(path, digest)
+
+        with self.db.transaction():
+            stored = self.db.fetch_all(
+                "SELECT data IS NULL FROM blobs WHERE hash=?", (digest,)
+            )
+            if not stored:
+                if in_sidecar:
+                    self._copy_to_sidecar(path, digest)
+                    self.db.persist(
+                        "INSERT INTO blobs (hash, size, data) VALUES (?, ?, NULL)",
+                        (digest, size),
+                    )
+                else:
+                    with open(path, "rb") as stream:
+                        self.db.persist_blob(
+                            "INSERT INTO blobs (hash, size, data) VALUES (?, ?, zeroblob(?))",
+                            (digest, size, size),
+                            "blobs",
+                            "data",
+                            stream,
+                            size,
+                        )
+            elif stored[0][0]:
+                self._copy_to_sidecar(path, digest)
+            return self.db.persist(
+                "INSERT INTO task_files (task_id, hash, filename) VALUES (?, ?, ?)",
+                (task_id, digest, path.name),
+            )
+
+    def list_for_task(self, task_id: int) -> List[Tuple[int, str, int]]:
+        """Return (id, filename, size) for each attachment of a task."""
+        return self.db.fetch_all(
+            "SELECT task_files.id, task_files.filename, blobs.size FROM task_files"
+            " JOIN blobs ON blobs.hash = task_files.hash"
+            " WHERE task_files.task_id=? ORDER BY task_files.id",
+            (task_id,),
+        )
+
+    def iter_content(
+        self, attachment_id: int, offset: int = 0, length: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Yield an attachment's content in chunks, optionally a byte range of it."""
+        rows = self.db.fetch_all(
+            "SELECT blobs.rowid, blobs.hash, blobs.data IS NULL, blobs.size FROM task_files"
+            " JOIN blobs ON blobs.hash = task_files.hash WHERE task_files.id=?",
+            (attachment_id,),
+        )
+        if not rows:
+            raise KeyError(f"No attachment with id {attachment_id}")
+        rowid, digest, in_sidecar, size = rows[0]
+        if not in_sidecar:
+            yield from self.db.iter_blob("blobs", "data", rowid, offset, length)
+            return
+
+        end = size if length is None else min(size, offset + length)
+        with open(self._sidecar_path(digest), "rb") as stream:
+            stream.seek(min(offset, end))
+            while stream.tell() < end:
+                check_current()
+                chunk = stream.read(min(TodoDB.BLOB_CHUNK_SIZE, end - stream.tell()))
+                if not chunk:
+                    break
+                yield chunk
+
+    def remove(self, attachment_id: int) -> None:
+        """Detach an attachment; its content is removed by the next sweep."""
+        self.db.persist("DELETE FROM task_files WHERE id=?", (attachment_id,))
+
+    def sweep_orphans(self) -> int:
+        """Delete contents no task refers to any more and return how many were removed."""
+        with self.db.transaction():
+            (removed,) = self.db.fetch_all(
+                "SELECT COUNT(*) FROM blobs WHERE ref_count <= 0"
+            )[0]
+            self.db.persist("DELETE FROM blobs WHERE ref_count <= 0")
+
+        # Sidecar files without a blobs row: those of the blobs just deleted,
+        # or left by an interrupted add. They go only once the deletes are
+        # committed, and while holding the writer, so no add can store the
+        # same content again in between (an add re-copies a missing file).
+        sidecar = attachment_dir(TodoDB.DB_PATH)
+        if sidecar.is_dir():
+            with self.db.exclusive():
+                known = {
+                    digest
+                    for (digest,) in self.db.fetch_all(
+                        "SELECT hash FROM blobs WHERE data IS NULL"
+                    )
+                }
+                for path in sidecar.glob("*/*"):
+                    # *.tmp files are copies still in progress
+                    if path.suffix != ".tmp" and path.name not in known:
+                        path.unlink(missing_ok=True)
+        return removed
@@ -0,0 +1,73 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class JobCancelled(Exception):
+    """Raised inside a job whose CancelToken was cancelled."""
+
+
+class CancelToken:
+    """Cancellation flag and optional deadline shared by a job and its owner.
+
+    The owner calls cancel(); the job calls check() (or lets TodoDB do it
+    through the progress handler of its connections) to stop early.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.deadline: Optional[float] = None
+        self._cancelled = threading.Event()
+
+    def start_clock(self) -> None:
+        """Start the timeout; called when the job starts running, not when queued."""
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def should_stop(self) -> bool:
+        return self.cancelled or self.expired
+
+    def check(self) -> None:
+        """Raise JobCancelled or TimeoutError if the job should stop."""
+        if self.cancelled:
+            raise JobCancelled()
+        if self.expired:
+            raise TimeoutError(f"Job took longer than {self.timeout} seconds")
+
+
+_local = threading.local()
+
+
+def current_token() -> Optional[CancelToken]:
+    """Return the token of the job running on this thread, if any."""
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def activate(token: CancelToken):
+    """Make token the current thread's token for the duration of the block."""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def check_current() -> None:
+    """Raise if the job running on this thread was cancelled or timed out."""
+    token = current_token()
+    if token is not None:
+        token.check()
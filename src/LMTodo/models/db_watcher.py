@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+
+from LMTodo.models.todo_db import ConnectionManager, TodoDB
+
+
+class DatabaseWatcher(QThread):
+    """Background thread that notices commits made by other LMTodo instances.
+
+    PRAGMA data_version is polled on a dedicated connection, which is cheap
+    while nothing changes. When it moves, the table_versions counters
+    are compared with the bumps this process made itself (see
+    ConnectionManager.local_bumps), and tables_changed is emitted with the
+    names of the tables someone else changed.
+    """
+
+    tables_changed = Signal(object)  # set of table names
+
+    POLL_INTERVAL = 1.0  # seconds
+
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        super().__init__()
+        self._poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self._conn = None
+        self._manager = None
+        self._data_version = None
+        self._versions = {}
+        self._local_bumps = {}
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._poll()
+            except sqlite3.Error:
+                self._close_conn()  # Retry with a fresh connection next time
+            self._stop_event.wait(self._poll_interval)
+        self._close_conn()
+
+    def start(self, *args, **kwargs):
+        # Restarts after stop() take a new baseline on a new connection
+        self._stop_event.clear()
+        super().start(*args, **kwargs)
+
+    def stop(self):
+        """Stop polling and wait for the thread to finish."""
+        self._stop_event.set()
+        self.wait()
+
+    @contextmanager
+    def paused(self):
+        """Stop polling for the block, e.g. while the database is closed or moved.
+
+        The watcher's own connection is closed meanwhile, and no poll can
+        reopen the database; polling resumes afterwards if it was running.
+        """
+        running = self.isRunning()
+        if running:
+            self.stop()
+        try:
+            yield
+        finally:
+            if running:
+                self.start()
+
+    def _close_conn(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _snapshot(self, manager):
+        # Holding the writer connection keeps our own commits out while both
+        # sides are read, so the two sets of counters always agree
+        with manager.writer():
+            versions = ConnectionManager.read_table_versions(self._conn)
+            local_bumps = dict(manager.local_bumps)
+        return versions, local_bumps
+
+    def _poll(self):
+        manager = TodoDB.connections()
+        if self._conn is None or manager is not self._manager:
+            # New database (or first run): take a baseline without notifying
+            self._close_conn()
+            self._conn = sqlite3.connect(Path(manager.db_path))
+            self._manager = manager
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            self._versions, self._local_bumps = self._snapshot(manager)
+            return
+
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        versions, local_bumps = self._snapshot(manager)
+        changed = {
+            name
+            for name, version in versions.items()
+            if version - self._versions.get(name, version)
+            > local_bumps.get(name, 0) - self._local_bumps.get(name, 0)
+        }
+        self._versions, self._local_bumps = versions, local_bumps
+        if changed:
+            self.tables_changed.emit(changed)
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, List
+
+# Environment variable naming a JSON file the metrics are written to on exit
+METRICS_ENV_VAR = "LMTODO_JOB_METRICS"
+
+# Upper bounds (ms) of the timing histogram buckets; the last bucket is open
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+TIMINGS = ("queue_wait", "run", "callback")
+
+
+class Histogram:
+    """Count, total, max and bucket counts of a series of durations in ms."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, value_ms: float) -> None:
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+        self.buckets[bisect_left(BUCKETS_MS, value_ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Return the bucket bound (capped at max) below which fraction of the values fall."""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": self.max,
+            "buckets": {
+                **{f"<={bound}ms": n for bound, n in zip(BUCKETS_MS, self.buckets)},
+                f">{BUCKETS_MS[-1]}ms": self.buckets[-1],
+            },
+        }
+
+
+class JobStats:
+    """Histograms of one job name."""
+
+    def __init__(self):
+        self.timings = {name: Histogram() for name in TIMINGS}
+        self.concurrency: Dict[int, int] = {}  # jobs running at start -> count
+        self.errors = 0
+        self.cancelled = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            **{name: hist.to_dict() for name, hist in self.timings.items()},
+            "concurrency": dict(sorted(self.concurrency.items())),
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+        }
+
+
+class JobMetrics:
+    """Thread-safe registry of per-job timing histograms (see ThreadRunner)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, JobStats] = {}
+        self._running = 0
+        self.max_running = 0
+
+    def job_started(self) -> int:
+        """Count a job as running and return how many run now, itself included."""
+        with self._lock:
+            self._running += 1
+            self.max_running = max(self.max_running, self._running)
+            return self._running
+
+    def job_finished(self) -> None:
+        with self._lock:
+            self._running -= 1
+
+    def record(
+        self,
+        name: str,
+        queue_wait: float,
+        run: float,
+        callback: float,
+        concurrency: int,
+        error: bool = False,
+    ) -> None:
+        """Add one delivered job; times are in seconds."""
+        with self._lock:
+            stats = self._jobs.setdefault(name, JobStats())
+            for timing, seconds in zip(TIMINGS, (queue_wait, run, callback)):
+                stats.timings[timing].add(seconds * 1000)
+            stats.concurrency[concurrency] = stats.concurrency.get(concurrency, 0) + 1
+            stats.errors += error
+
+    def record_cancelled(self, name: str) -> None:
+        with self._lock:
+            self._jobs.setdefault(name, JobStats()).cancelled += 1
+
+    def record_error(self, name: str) -> None:
+        """Count a failed job whose timings are unknown."""
+        with self._lock:
+            self._jobs.setdefault(name, JobStats()).errors += 1
+
+    def snapshot(self) -> Dict:
+        """Return every job's statistics as plain JSON-serializable data."""
+        with self._lock:
+            return {
+                "max_running": self.max_running,
+                "jobs": {
+                    name: stats.to_dict() for name, stats in sorted(self._jobs.items())
+                },
+            }
+
+    def format_table(self) -> str:
+        """Return a fixed-width text summary, one line per job and timing."""
+        lines: List[str] = [
+            f"{'job':<48} {'timing':<10} {'count':>6} {'mean':>8} {'p95':>8} {'max':>8}"
+        ]
+        data = self.snapshot()
+        for name, stats in data["jobs"].items():
+            for timing in TIMINGS:
+                hist = stats[timing]
+                lines.append(
+                    f"{name[:48]:<48} {timing:<10} {hist['count']:>6}"
+                    f" {hist['mean_ms']:>8.1f} {hist['p95_ms']:>8.1f} {hist['max_ms']:>8.1f}"
+                )
+        lines.append(f"max concurrent jobs: {data['max_running']}")
+        return "\n".join(lines)
+
+    def dump_if_requested(self) -> None:
+        """Write the snapshot as JSON to the file named by METRICS_ENV_VAR, if set."""
+        path = os.environ.get(METRICS_ENV_VAR)
+        if path:
+            with open(path, "w", encoding="utf-8") as out:
+                json.dump(self.snapshot(), out, indent=2)
+
+
+job_metrics = JobMetrics()
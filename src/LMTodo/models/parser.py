@@ -22,6 +22,9 @@ class TodoConfigParser:
             "default_filter": "Open",
             # Default sort method for task list on startup: creation|due|status
             "default_sort": "creation",
+            # Attachments of at least this many MB are stored next to the
+            # database instead of inside it; 0 keeps them all in the database
+            "attachment_sidecar_min_mb": "8",
         },
         "Shortcuts": {
             "add_project": "Ctrl+P",
@@ -89,6 +92,20 @@ class TodoConfigParser:
             "General", "db_path", fallback=self.DEFAULTS["General"]["db_path"]
         )
 
+    def get_attachment_sidecar_min_size(self):
+        """Return the sidecar size threshold in bytes, or None if disabled."""
+        try:
+            size_mb = float(
+                self.get(
+                    "General",
+                    "attachment_sidecar_min_mb",
+                    fallback=self.DEFAULTS["General"]["attachment_sidecar_min_mb"],
+                )
+            )
+        except ValueError:
+            size_mb = float(self.DEFAULTS["General"]["attachment_sidecar_min_mb"])
+        return int(size_mb * 1024 * 1024) if size_mb > 0 else None
+
     def save_window_settings(self, width, height, x, y):
         """Persist the window size and position to the configuration file."""
         self.set("Window", "width", str(width))
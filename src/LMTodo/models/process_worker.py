@@ -0,0 +1,69 @@
+"""Code that runs inside the worker processes of ProcessRunner.
+
+Kept free of Qt so the spawned processes import only what the jobs need.
+"""
+
+import time
+from pathlib import Path
+
+from LMTodo.models.cancellation import JobCancelled
+from LMTodo.models.todo_db import TodoDB
+
+_progress_queue = None
+_stop_event = None  # Set when the pool shuts down
+_cancelled_jobs = None  # Ids of running jobs whose runner was cancelled
+_job_id = None
+
+
+def cpu_bound(func):
+    """Mark a job function to run in a worker process (see qthread_helper.start_job).
+
+    The function must be defined at module level so it can be pickled.
+    """
+    func.cpu_bound = True
+    return func
+
+
+def init_worker(progress_queue, stop_event=None, cancelled_jobs=None):
+    """Process pool initializer: keep the queue report_progress writes to, and
+    the stop event and cancelled job ids it checks."""
+    global _progress_queue, _stop_event, _cancelled_jobs
+    _progress_queue = progress_queue
+    _stop_event = stop_event
+    _cancelled_jobs = cancelled_jobs
+
+
+def run_job(job_id, db_path, job_func, args, kwargs):
+    """Run one job against db_path; return (result, started, finished) wall times."""
+    global _job_id
+    started = time.time()
+    # Each worker keeps its own connections, reopened if the database moved
+    TodoDB.DB_PATH = Path(db_path)
+    _job_id = job_id
+    try:
+        result = job_func(*args, **kwargs)
+    finally:
+        _job_id = None
+    return result, started, time.time()
+
+
+def stop_requested():
+    """Return True if the running job was cancelled or the pool is shutting down."""
+    if _job_id is None:
+        return False
+    if _stop_event is not None and _stop_event.is_set():
+        return True
+    return _cancelled_jobs is not None and _job_id in _cancelled_jobs[:]
+
+
+def report_progress(done, total=None):
+    """Send a progress update from a running job to its progress_callback.
+
+    Raises JobCancelled once the job should stop (see stop_requested), so
+    jobs that report progress can be interrupted. Does nothing when the job
+    is not running in a worker process.
+    """
+    if _progress_queue is not None and _job_id is not None:
+        _progress_queue.put((_job_id, done, total))
+    if stop_requested():
+        raise JobCancelled()
@@ -1,42 +1,461 @@
-from PySide6.QtCore import QObject, Signal, QThread
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+
+from PySide6.QtCore import QObject, QRunnable, Qt, QThreadPool, QTimer, Signal
+
+from LMTodo.models import process_worker
+from LMTodo.models.cancellation import CancelToken, JobCancelled, activate
+from LMTodo.models.job_metrics import job_metrics
+from LMTodo.models.todo_db import TodoDB
+
 
 class Worker(QObject):
-    finished = Signal(object)  # send back result or None
+    finished = Signal(object)  # send back the result (None included)
+    failed = Signal(object)  # send back the exception raised by the job
 
-    def __init__(self, job_func, *args, **kwargs):
+    def __init__(self, job_func, *args, token=None, **kwargs):
         super().__init__()
         self._job_func = job_func
         self._args = args
         self._kwargs = kwargs
+        self.token = token or CancelToken()
+        # perf_counter() timestamps and concurrency, read by ThreadRunner
+        self.started_at = self.finished_at = None
+        self.concurrency = 0
 
     def run(self):
+        # Cancelled jobs emit nothing, so stale callbacks never run
+        if self.token.cancelled:
+            return
+        self.token.start_clock()
+        self.started_at = time.perf_counter()
+        self.concurrency = job_metrics.job_started()
         try:
-            result = self._job_func(*self._args, **self._kwargs)
+            with activate(self.token):
+                result = self._job_func(*self._args, **self._kwargs)
+        except JobCancelled:
+            return
         except Exception as e:
-            result = e
-        self.finished.emit(result)
+            if not self.token.cancelled:
+                self.failed.emit(e)
+            return
+        finally:
+            self.finished_at = time.perf_counter()
+            job_metrics.job_finished()
+        if not self.token.cancelled:
+            self.finished.emit(result)
 
 
-class ThreadRunner(QThread):
-    """QThread wrapper that auto‑removes itself from a container on finish."""
-    _active_threads = set()
+class _Job(QRunnable):
+    """QRunnable that runs a Worker on a pool thread."""
 
-    def __init__(self, job_func, done_callback=None, *args, **kwargs):
+    def __init__(self, worker):
         super().__init__()
-        self._worker = Worker(job_func, *args, **kwargs)
-        self._worker.moveToThread(self)
+        self._worker = worker
+
+    def run(self):
+        self._worker.run()
+
+
+class ThreadRunner(QObject):
+    """Run a job on a shared pool of reusable threads and call done_callback
+    with its result on the caller's thread.
+
+    If the job raises, error_callback gets the exception instead (TimeoutError
+    once it runs longer than timeout seconds); without one the error is
+    printed. cancel() stops a queued job from starting, interrupts its
+    database queries and guarantees neither callback runs.
+
+    At most MAX_THREADS jobs run at once; the rest wait in the pool's queue
+    in the order they were started.
+    """
+
+    MAX_THREADS = 4
+    _pool = None
+    _active_runners = set()
+
+    def __init__(
+        self,
+        job_func,
+        done_callback=None,
+        *args,
+        error_callback=None,
+        timeout=None,
+        **kwargs,
+    ):
+        super().__init__()
+        self.token = CancelToken(timeout)
+        self._worker = Worker(job_func, *args, token=self.token, **kwargs)
+        self._job_name = job_name(job_func)
+        self._queued_at = None
         self._done_callback = done_callback
+        self._error_callback = error_callback
+        # Queued, so the callbacks run on this object's (the UI) thread
+        self._worker.finished.connect(self._handle_done, Qt.QueuedConnection)
+        self._worker.failed.connect(self._handle_error, Qt.QueuedConnection)
+
+    @classmethod
+    def pool(cls):
+        if cls._pool is None:
+            cls._pool = QThreadPool()
+            cls._pool.setMaxThreadCount(cls.MAX_THREADS)
+        return cls._pool
 
-        self.started.connect(self._worker.run)
-        self._worker.finished.connect(self._handle_done)
+    @classmethod
+    def wait_for_done(cls, msecs=-1):
+        """Block until every started job has finished (e.g. before closing the DB)."""
+        return cls._pool is None or cls._pool.waitForDone(msecs)
 
-        self.__class__._active_threads.add(self)
+    def start(self):
+        self.__class__._active_runners.add(self)
+        self._queued_at = time.perf_counter()
+        self.pool().start(_Job(self._worker))
+        return self
+
+    def cancel(self):
+        """Abandon the job; its result or error is never delivered."""
+        if not self.token.cancelled and self in self.__class__._active_runners:
+            job_metrics.record_cancelled(self._job_name)
+        self.token.cancel()
+        self.__class__._active_runners.discard(self)
+
+    def _record(self, callback_started, error=False):
+        worker = self._worker
+        job_metrics.record(
+            self._job_name,
+            queue_wait=worker.started_at - self._queued_at,
+            run=worker.finished_at - worker.started_at,
+            callback=time.perf_counter() - callback_started,
+            concurrency=worker.concurrency,
+            error=error,
+        )
 
     def _handle_done(self, result):
-        if callable(self._done_callback):
-            self._done_callback(result)
-        self.__class__._active_threads.discard(self)
-        self.quit()
-        self.wait()
+        self.__class__._active_runners.discard(self)
+        if self.token.cancelled:
+            return
+        callback_started = time.perf_counter()
+        try:
+            if callable(self._done_callback):
+                self._done_callback(result)
+        finally:
+            self._record(callback_started)
+
+    def _handle_error(self, error):
+        self.__class__._active_runners.discard(self)
+        if self.token.cancelled:
+            return
+        callback_started = time.perf_counter()
+        try:
+            report_error(self._job_name, self._error_callback, error)
+        finally:
+            self._record(callback_started, error=True)
+
+
+def job_name(job_func):
+    """Return a short name such as 'todo_controller.get_tasks' for a job function."""
+    module = getattr(job_func, "__module__", None) or ""
+    name = getattr(job_func, "__qualname__", None) or repr(job_func)
+    return f"{module.rsplit('.', 1)[-1]}.{name}" if module else name
+
+
+def report_error(name, error_callback, error):
+    """Pass a failed job's error to error_callback, or print it without one."""
+    if callable(error_callback):
+        error_callback(error)
+    else:
+        print(f"Background job {name} failed: {error!r}")
+
+
+class _FutureRunner(QObject):
+    """Base of the runners whose job ends in a future (see ProcessRunner and
+    AsyncRunner).
+
+    The future's result goes to done_callback, or its error to
+    error_callback, on the thread the runner was created on, and the job is
+    recorded in job_metrics. Subclasses set _future, keep track of their
+    running instances (_forget) and say how to read the future's value
+    (_split_result).
+    """
+
+    _future_done = Signal(object)
+
+    def __init__(self, name, done_callback=None, error_callback=None):
+        super().__init__()
+        self._job_name = name
+        self._done_callback = done_callback
+        self._error_callback = error_callback
+        self._future = None
+        self._concurrency = 0
+        self.cancelled = False
+        # Queued, so the callbacks run on this object's (the UI) thread
+        self._future_done.connect(self._handle_future, Qt.QueuedConnection)
+
+    def _forget(self):
+        """Drop the runner from the running ones; True if it was one of them."""
+        raise NotImplementedError
+
+    def _split_result(self, value):
+        """Return the (result, queue wait, run time) of the future's value."""
+        raise NotImplementedError
+
+    def _stop_running(self):
+        """Ask a job that already started, and so cannot be dropped, to stop."""
+
+    def cancel(self):
+        """Abandon the job; its result or error is never delivered."""
+        self.cancelled = True
+        if self._future is not None and not self._future.cancel():
+            self._stop_running()
+        if self._forget():
+            job_metrics.record_cancelled(self._job_name)
+
+    def _handle_future(self, future):
+        self._forget()
+        if self.cancelled:
+            return
+        callback_started = time.perf_counter()
+        try:
+            result, queue_wait, run = self._split_result(future.result())
+        except (CancelledError, JobCancelled):
+            return  # Dropped, or stopped by a shutdown
+        except Exception as error:
+            # The job's timings are lost with its result; count the error only
+            job_metrics.record_error(self._job_name)
+            report_error(self._job_name, self._error_callback, error)
+            return
+        try:
+            if callable(self._done_callback):
+                self._done_callback(result)
+        finally:
+            job_metrics.record(
+                self._job_name,
+                queue_wait=queue_wait,
+                run=run,
+                callback=time.perf_counter() - callback_started,
+                concurrency=self._concurrency,
+            )
+
+
+class ProcessRunner(_FutureRunner):
+    """Run a CPU-bound job in a worker process and call done_callback with its
+    result on the caller's thread, like ThreadRunner.
+
+    The job function and its arguments must be picklable; the worker opens
+    its own connections to TodoDB.DB_PATH. Progress sent by the job through
+    process_worker.report_progress(done, total) reaches progress_callback.
+    cancel() drops a queued job and discards the result of a running one,
+    which stops at its next report_progress call.
+    """
+
+    MAX_PROCESSES = max(1, (os.cpu_count() or 2) - 1)
+    PROGRESS_POLL_INTERVAL = 50  # ms
+    CANCEL_SLOTS = 64  # Cancelled running jobs remembered, oldest overwritten
+    _executor = None
+    _progress_queue = None
+    _stop_event = None
+    _cancelled_jobs = None
+    _cancel_slots = itertools.count()
+    _poll_timer = None
+    _active_runners = {}  # job id -> runner
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        job_func,
+        done_callback=None,
+        *args,
+        error_callback=None,
+        progress_callback=None,
+        **kwargs,
+    ):
+        super().__init__(
+            f"{job_name(job_func)} [process]", done_callback, error_callback
+        )
+        self._job_func = job_func
+        self._args = args
+        self._kwargs = kwargs
+        self._progress_callback = progress_callback
+        self._job_id = next(self._ids)
+        self._queued_at = None
+
+    @classmethod
+    def _pool(cls):
+        if cls._executor is None:
+            # spawn: forking a process that runs Qt threads is not safe
+            context = multiprocessing.get_context("spawn")
+            cls._progress_queue = context.Queue()
+            cls._stop_event = context.Event()
+            cls._cancelled_jobs = context.Array("q", cls.CANCEL_SLOTS)
+            cls._executor = ProcessPoolExecutor(
+                cls.MAX_PROCESSES,
+                mp_context=context,
+                initializer=process_worker.init_worker,
+                initargs=(cls._progress_queue, cls._stop_event, cls._cancelled_jobs),
+            )
+            cls._poll_timer = QTimer()
+            cls._poll_timer.setInterval(cls.PROGRESS_POLL_INTERVAL)
+            cls._poll_timer.timeout.connect(cls._poll_progress)
+        return cls._executor
+
+    @classmethod
+    def _poll_progress(cls):
+        while True:
+            try:
+                job_id, done, total = cls._progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            runner = cls._active_runners.get(job_id)
+            if runner is not None and callable(runner._progress_callback):
+                runner._progress_callback(done, total)
+        if not cls._active_runners:
+            cls._poll_timer.stop()
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the worker processes, dropping queued jobs (e.g. on exit).
+
+        Running jobs are told to stop and left to exit on their own, so the
+        caller does not wait for them.
+        """
+        if cls._executor is not None:
+            cls._stop_event.set()
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+            cls._poll_timer.stop()
+            cls._active_runners.clear()
+
+    def start(self):
+        executor = self._pool()
+        self.__class__._active_runners[self._job_id] = self
+        self._concurrency = len(self._active_runners)  # Jobs in flight
+        self._queued_at = time.time()
+        self._future = executor.submit(
+            process_worker.run_job,
+            self._job_id,
+            str(TodoDB.DB_PATH),
+            self._job_func,
+            self._args,
+            self._kwargs,
+        )
+        self._future.add_done_callback(self._future_done.emit)
+        self._poll_timer.start()
+        return self
+
+    def _forget(self):
+        return self.__class__._active_runners.pop(self._job_id, None) is not None
+
+    def _split_result(self, value):
+        result, started, finished = value  # Wall times, see process_worker.run_job
+        return result, started - self._queued_at, finished - started
+
+    def _stop_running(self):
+        # Have the job stop at its next progress report
+        cls = self.__class__
+        cls._cancelled_jobs[next(cls._cancel_slots) % cls.CANCEL_SLOTS] = self._job_id
+
+    def _handle_future(self, future):
+        self._poll_progress()  # Deliver progress sent before the result
+        super()._handle_future(future)
+
+
+async def _cancel_all_tasks():
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class AsyncRunner(_FutureRunner):
+    """Run a coroutine function on a shared asyncio event loop thread and call
+    done_callback with its result on the caller's thread, like ThreadRunner.
+
+    This lets Qt code use async_controller. cancel() cancels the coroutine,
+    which interrupts its database queries, and guarantees neither callback
+    runs.
+    """
+
+    _loop = None
+    _loop_thread = None
+    _active_runners = set()
+
+    def __init__(
+        self,
+        coro_func,
+        done_callback=None,
+        *args,
+        error_callback=None,
+        **kwargs,
+    ):
+        super().__init__(
+            f"{job_name(coro_func)} [async]", done_callback, error_callback
+        )
+        self._coro_func = coro_func
+        self._args = args
+        self._kwargs = kwargs
+        self._started_at = self._finished_at = None
+
+    @classmethod
+    def loop(cls):
+        if cls._loop is None:
+            cls._loop = asyncio.new_event_loop()
+            cls._loop_thread = threading.Thread(
+                target=cls._loop.run_forever, name="LMTodo asyncio", daemon=True
+            )
+            cls._loop_thread.start()
+        return cls._loop
+
+    @classmethod
+    def shutdown(cls):
+        """Cancel the running coroutines and stop the event loop (e.g. on exit)."""
+        if cls._loop is None:
+            return
+        for runner in list(cls._active_runners):
+            runner.cancel()
+        loop = cls._loop
+        asyncio.run_coroutine_threadsafe(_cancel_all_tasks(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        cls._loop_thread.join()
+        loop.close()
+        cls._loop = cls._loop_thread = None
+
+    def start(self):
+        loop = self.loop()
+        self.__class__._active_runners.add(self)
+        self._concurrency = len(self._active_runners)  # Coroutines in flight
+        self._started_at = time.perf_counter()
+        self._future = asyncio.run_coroutine_threadsafe(
+            self._coro_func(*self._args, **self._kwargs), loop
+        )
+        self._future.add_done_callback(self._on_future_done)
+        return self
+
+    def _forget(self):
+        running = self in self.__class__._active_runners
+        self.__class__._active_runners.discard(self)
+        return running
+
+    def _split_result(self, value):
+        # Coroutines start right away, so they never wait in a queue
+        return value, 0.0, self._finished_at - self._started_at
+
+    def _on_future_done(self, future):
+        # Runs on the event loop thread
+        self._finished_at = time.perf_counter()
+        self._future_done.emit(future)
 
 
+def start_job(job_func, done_callback=None, *args, **kwargs):
+    """Start job_func on a ProcessRunner if it is marked cpu_bound, else a ThreadRunner."""
+    if getattr(job_func, "cpu_bound", False):
+        runner = ProcessRunner(job_func, done_callback, *args, **kwargs)
+    else:
+        kwargs.pop("progress_callback", None)
+        runner = ThreadRunner(job_func, done_callback, *args, **kwargs)
+    return runner.start()
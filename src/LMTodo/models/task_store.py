@@ -0,0 +1,198 @@
+from bisect import bisect_left, insort
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+Task = Tuple  # TASK_COLUMNS row: id, title, status, ..., project_id, comments
+
+
+@lru_cache(maxsize=4096)
+def date_ordinal(value: Optional[str]) -> Optional[int]:
+    """Return the day number of a yyyy-MM-dd date, None if it is empty or invalid.
+
+    Tasks share few distinct dates, so each one is parsed only once.
+    """
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def today_ordinal() -> int:
+    return date.today().toordinal()
+
+
+class TaskStore:
+    """The loaded task rows, kept in display order and indexed for filtering.
+
+    Tasks are held by id, ordered by sort_key, and indexed by project, by
+    status and by due date, so select() answers a project and filter from
+    the indexes instead of scanning every row. sort_key must end with the
+    task id, like todo_controller.task_sort_key; without one the tasks keep
+    the order they were added in (e.g. search results ranked by relevance).
+
+    Due dates are indexed as day numbers (see date_ordinal) and compared
+    with today, the day the store classifies On Time and Overdue tasks
+    against; set_today moves it on, e.g. at midnight.
+    """
+
+    def __init__(self, sort_key: Optional[Callable[[Task], Tuple]] = None):
+        self.project_names: Dict[int, str] = {}
+        self.today = today_ordinal()
+        self._clear(sort_key)
+
+    def _clear(self, sort_key: Optional[Callable[[Task], Tuple]]) -> None:
+        self._sort_key = sort_key
+        self._tasks: Dict[int, Task] = {}
+        self._keys: Dict[int, Tuple] = {}
+        self._order: List[Tuple] = []  # Sorted keys
+        self._by_project: Dict[int, Set[int]] = {}
+        self._by_status: Dict[str, Set[int]] = {}
+        self._by_due: Dict[Optional[int], Set[int]] = {}  # By due day number
+        self._due_days: List[int] = []  # Sorted keys of _by_due, None excluded
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._tasks
+
+    def __iter__(self) -> Iterator[Task]:
+        """Iterate over the tasks in display order."""
+        return (self._tasks[key[-1]] for key in self._order)
+
+    def get(self, task_id: int) -> Optional[Task]:
+        return self._tasks.get(task_id)
+
+    def key(self, task: Task) -> Tuple:
+        """Return the sort key task has, or would get if added now."""
+        if self._sort_key is not None:
+            return self._sort_key(task)
+        if task[0] in self._keys:
+            return self._keys[task[0]]
+        return (self._order[-1][0] + 1 if self._order else 0, task[0])
+
+    def reset(
+        self, tasks: Iterable[Task], sort_key: Optional[Callable[[Task], Tuple]] = None
+    ) -> None:
+        """Replace every task, ordering them by sort_key from now on."""
+        self._clear(sort_key)
+        self.extend(tasks)
+
+    def extend(self, tasks: Iterable[Task]) -> None:
+        for task in tasks:
+            self.put(task)
+
+    def put(self, task: Task) -> None:
+        """Add a task, or replace the one with the same id."""
+        key = self.key(task)
+        self.remove(task[0])
+        task_id, _title, status, _created, due_date, _closed, project_id = task[:7]
+        due_day = date_ordinal(due_date)
+        self._tasks[task_id] = task
+        self._keys[task_id] = key
+        insort(self._order, key)
+        self._by_project.setdefault(project_id, set()).add(task_id)
+        self._by_status.setdefault(status, set()).add(task_id)
+        if due_day not in self._by_due:
+            self._by_due[due_day] = set()
+            if due_day is not None:
+                insort(self._due_days, due_day)
+        self._by_due[due_day].add(task_id)
+
+    def remove(self, task_id: int) -> Optional[Task]:
+        """Drop a task; return it, or None if it was not there."""
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return None
+        key = self._keys.pop(task_id)
+        del self._order[bisect_left(self._order, key)]
+        _task_id, _title, status, _created, due_date, _closed, project_id = task[:7]
+        self._discard(self._by_project, project_id, task_id)
+        self._discard(self._by_status, status, task_id)
+        due_day = date_ordinal(due_date)
+        if self._discard(self._by_due, due_day, task_id) and due_day is not None:
+            del self._due_days[bisect_left(self._due_days, due_day)]
+        return task
+
+    @staticmethod
+    def _discard(index: Dict, value, task_id: int) -> bool:
+        """Remove task_id from index[value]; True if that emptied the bucket."""
+        ids = index[value]
+        ids.discard(task_id)
+        if not ids:
+            del index[value]
+            return True
+        return False
+
+    def _due_between(self, start: Optional[int], end: Optional[int]) -> Set[int]:
+        """Return the ids of the tasks due on or after day start and before end."""
+        low = bisect_left(self._due_days, start) if start is not None else 0
+        high = bisect_left(self._due_days, end) if end is not None else None
+        ids: Set[int] = set()
+        for due_day in self._due_days[low:high]:
+            ids |= self._by_due[due_day]
+        return ids
+
+    def _filter_ids(self, task_filter: str, today: int) -> Optional[Set[int]]:
+        """Return the ids passing a TaskFilterWidget filter, None for all of them."""
+        open_ids = self._by_status.get("open", set())
+        if task_filter == "On Time":
+            return open_ids & self._due_between(today, None)
+        if task_filter == "Overdue":
+            overdue = self._due_between(None, today) | self._by_due.get(None, set())
+            return open_ids & overdue
+        status = {"Open": "open", "Finished": "complete", "Cancelled": "cancelled"}
+        if task_filter in status:
+            return self._by_status.get(status[task_filter], set())
+        return None
+
+    def select(
+        self,
+        project_id: Optional[int] = None,
+        task_filter: str = "All",
+        today: Optional[int] = None,
+    ) -> List[Task]:
+        """Return the tasks of a project (None for all) passing task_filter, in order.
+
+        Matches the conditions of todo_controller.TASK_FILTERS; today is a
+        day number and defaults to the store's today.
+        """
+        if today is None:
+            today = self.today
+        candidates = [self._filter_ids(task_filter, today)]
+        if project_id:
+            candidates.append(self._by_project.get(project_id, set()))
+        candidates = sorted((ids for ids in candidates if ids is not None), key=len)
+        if not candidates:
+            return list(self)
+        return self._in_order(candidates[0].intersection(*candidates[1:]))
+
+    def _in_order(self, ids: Iterable[int]) -> List[Task]:
+        keys = sorted(self._keys[task_id] for task_id in ids)
+        return [self._tasks[key[-1]] for key in keys]
+
+    def set_today(self, today: Optional[int] = None) -> List[Task]:
+        """Move today to another day (default: the current one).
+
+        Returns the open tasks that became overdue on the way, in order;
+        only they change filter, so nothing else needs a second look.
+        """
+        if today is None:
+            today = today_ordinal()
+        previous, self.today = self.today, today
+        if today <= previous:
+            return []
+        open_ids = self._by_status.get("open", set())
+        return self._in_order(open_ids & self._due_between(previous, today))
+
+    def set_projects(self, projects: Iterable[Tuple[int, str]]) -> bool:
+        """Update the project id -> name map; True if any name changed."""
+        project_names = dict(projects)
+        if project_names == self.project_names:
+            return False
+        self.project_names = project_names
+        return True
+
+    def project_name(self, project_id: int) -> str:
+        return self.project_names.get(project_id) or ""
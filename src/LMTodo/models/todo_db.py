@@ -1,74 +1,666 @@
+import hashlib
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, List, Tuple
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from LMTodo.models.cancellation import check_current, current_token
+
+
+def _migrate_files_to_blobs(conn: sqlite3.Connection) -> None:
+    """Move attachments into the content-addressed blobs/task_files tables.
+
+    Each distinct content is stored once in blobs, keyed by its SHA-256 digest,
+    and task_files links it to tasks. Triggers keep blobs.ref_count equal to
+    the number of links, so unreferenced blobs can be swept later. A blob with
+    NULL data lives in the sidecar directory next to the database instead.
+    """
+    conn.execute("""
+        CREATE TABLE blobs (
+            hash TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            data BLOB,
+            ref_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE task_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,
+            hash TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            FOREIGN KEY(task_id) REFERENCES tasks(id) ON DELETE CASCADE,
+            FOREIGN KEY(hash) REFERENCES blobs(hash)
+        )
+    """)
+    conn.execute("CREATE INDEX idx_task_files_task_id ON task_files(task_id)")
+    conn.execute("CREATE INDEX idx_task_files_hash ON task_files(hash)")
+    conn.execute("CREATE INDEX idx_blobs_ref_count ON blobs(ref_count)")
+    conn.execute("""
+        CREATE TRIGGER task_files_ref_insert AFTER INSERT ON task_files BEGIN
+            UPDATE blobs SET ref_count = ref_count + 1 WHERE hash = NEW.hash;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER task_files_ref_delete AFTER DELETE ON task_files BEGIN
+            UPDATE blobs SET ref_count = ref_count - 1 WHERE hash = OLD.hash;
+        END
+    """)
+
+    files = conn.execute("SELECT id, filename, task_id FROM files").fetchall()
+    for file_id, filename, task_id in files:
+        digest = hashlib.sha256()
+        if hasattr(conn, "blobopen"):
+            with conn.blobopen("files", "data", file_id, readonly=True) as blob:
+                while chunk := blob.read(TodoDB.BLOB_CHUNK_SIZE):
+                    digest.update(chunk)
+        else:
+            digest.update(
+                conn.execute(
+                    "SELECT data FROM files WHERE id=?", (file_id,)
+                ).fetchone()[0]
+            )
+        conn.execute(
+            "INSERT OR IGNORE INTO blobs (hash, size, data) SELECT ?, length(data), data FROM files WHERE id=?",
+            (digest.hexdigest(), file_id),
+        )
+        if task_id is not None:
+            conn.execute(
+                "INSERT INTO task_files (task_id, hash, filename) VALUES (?, ?, ?)",
+                (task_id, digest.hexdigest(), filename),
+            )
+    conn.execute("DROP TABLE files")
+
+
+# Schema migrations, applied in order on top of the base tables created by
+# TodoDB.init_db. Entry N upgrades a database from user_version N to N + 1 and
+# is either a tuple of SQL statements or a function taking the connection;
+# append new entries, never edit or reorder existing ones.
+MIGRATIONS: List[Union[Tuple[str, ...], Callable[[sqlite3.Connection], None]]] = [
+    # 1: indexes for the task queries run by todo_controller
+    (
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_status_due ON tasks(project_id, status, due_date)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_due ON tasks(status, due_date)",
+        "CREATE INDEX IF NOT EXISTS idx_files_task_id ON files(task_id)",
+    ),
+    # 2: due date sort key used by todo_controller.get_tasks_page
+    (
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_due_key ON tasks(status, IFNULL(due_date, '9999-12-31'))",
+    ),
+    # 3: content-addressed, deduplicated attachments
+    _migrate_files_to_blobs,
+    # 4: full-text index over task titles and comments, kept in sync by triggers
+    (
+        "CREATE VIRTUAL TABLE tasks_fts USING fts5(title, comments, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        """
+        CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts(rowid, title, comments) VALUES (NEW.id, NEW.title, NEW.comments);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, comments) VALUES ('delete', OLD.id, OLD.title, OLD.comments);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, comments ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, comments) VALUES ('delete', OLD.id, OLD.title, OLD.comments);
+            INSERT INTO tasks_fts(rowid, title, comments) VALUES (NEW.id, NEW.title, NEW.comments);
+        END
+        """,
+        "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+    ),
+    # 5: per-table change counters, read by DatabaseWatcher
+    (
+        "CREATE TABLE table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)",
+        "INSERT INTO table_versions (name) VALUES ('projects'), ('tasks')",
+        *(
+            f"""
+            CREATE TRIGGER {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+            END
+            """
+            for table in ("projects", "tasks")
+            for event in ("INSERT", "UPDATE", "DELETE")
+        ),
+    ),
+    # 6: task change log for todo_controller.get_tasks_changed_since. Each task
+    # keeps one row whose rev is replaced by a new, higher one on every change;
+    # deleted tasks stay behind as tombstones.
+    (
+        "CREATE TABLE task_changes (rev INTEGER PRIMARY KEY AUTOINCREMENT, task_id INTEGER NOT NULL UNIQUE, deleted INTEGER NOT NULL DEFAULT 0)",
+        "INSERT INTO task_changes (task_id) SELECT id FROM tasks ORDER BY id",
+        """
+        CREATE TRIGGER task_changes_insert AFTER INSERT ON tasks BEGIN
+            REPLACE INTO task_changes (task_id, deleted) VALUES (NEW.id, 0);
+        END
+        """,
+        """
+        CREATE TRIGGER task_changes_update AFTER UPDATE ON tasks BEGIN
+            REPLACE INTO task_changes (task_id, deleted) VALUES (NEW.id, 0);
+        END
+        """,
+        """
+        CREATE TRIGGER task_changes_delete AFTER DELETE ON tasks BEGIN
+            REPLACE INTO task_changes (task_id, deleted) VALUES (OLD.id, 1);
+        END
+        """,
+    ),
+    # 7: an index for each project/status and sort key pair of
+    # todo_controller.get_tasks_page, so pages are read in index order. The
+    # rowid ends every index, which serves the id tiebreak and the creation sort;
+    # the expressions must match TASK_SORT_KEYS exactly.
+    (
+        "CREATE INDEX idx_tasks_status ON tasks(status)",
+        "CREATE INDEX idx_tasks_project ON tasks(project_id)",
+        "CREATE INDEX idx_tasks_project_status ON tasks(project_id, status)",
+        "CREATE INDEX idx_tasks_due_key ON tasks(IFNULL(due_date, '9999-12-31'))",
+        "CREATE INDEX idx_tasks_project_due_key ON tasks(project_id, IFNULL(due_date, '9999-12-31'))",
+        "CREATE INDEX idx_tasks_project_status_due_key ON tasks(project_id, status, IFNULL(due_date, '9999-12-31'))",
+        "CREATE INDEX idx_tasks_status_key ON tasks(CASE status WHEN 'open' THEN 0 WHEN 'complete' THEN 1 ELSE 2 END)",
+        "CREATE INDEX idx_tasks_project_status_key ON tasks(project_id, CASE status WHEN 'open' THEN 0 WHEN 'complete' THEN 1 ELSE 2 END)",
+        "CREATE INDEX idx_tasks_status_status_key ON tasks(status, CASE status WHEN 'open' THEN 0 WHEN 'complete' THEN 1 ELSE 2 END)",
+        "CREATE INDEX idx_tasks_project_status_status_key ON tasks(project_id, status, CASE status WHEN 'open' THEN 0 WHEN 'complete' THEN 1 ELSE 2 END)",
+    ),
+]
+
+
+class _WriteRequest:
+    """A caller waiting for, then holding, the writer connection."""
+
+    def __init__(self, transactional: bool):
+        self.transactional = transactional
+        self.ready = threading.Event()  # The connection is lent to the caller
+        self.released = threading.Event()  # The caller is done with it
+        self.done = threading.Event()  # Its transaction committed or failed
+        self.failed = False  # The caller's block raised
+        self.error: Optional[BaseException] = None  # BEGIN or COMMIT failed
 
-class TodoDB:
-    DB_PATH = Path(__file__).parent.parent / "todo.db"
+
+class ConnectionManager:
+    """Keeps SQLite connections to one database file open between queries.
+
+    All writes go through one writer thread that owns the writer connection
+    and lends it to the waiting callers one at a time, in FIFO order. Callers
+    queued together share one transaction (each in its own savepoint, so a
+    failing block only undoes itself) and one commit. Reads check out a
+    reader connection from a small pool, so every thread running a query at
+    the same time gets its own WAL snapshot.
+    """
+
+    PRAGMAS = (
+        "PRAGMA foreign_keys = ON;",
+        "PRAGMA synchronous = NORMAL;",
+        "PRAGMA cache_size = -8000;",
+        "PRAGMA temp_store = MEMORY;",
+        "PRAGMA busy_timeout = 5000;",
+    )
+    MAX_BATCH = 64  # Most write requests grouped into one commit
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._writer = None
+        self._writer_thread = None
+        self._requests: "queue.Queue[Optional[_WriteRequest]]" = queue.Queue()
+        self._lent = threading.local()  # .conn while this thread holds the writer
+        self._start_lock = threading.Lock()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        # How many times this process's commits bumped each table_versions
+        # counter, so DatabaseWatcher can tell our writes from other instances'
+        self.local_bumps: Dict[str, int] = {}
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _check_open(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+
+    def holds_writer(self) -> bool:
+        """Return True if the calling thread holds the writer connection."""
+        return getattr(self._lent, "conn", None) is not None
+
+    # SQLite virtual machine instructions between cancellation checks
+    PROGRESS_INTERVAL = 1000
 
     @staticmethod
-    def init_db(db_path=None):
-        if db_path is not None:
-            TodoDB.DB_PATH = Path(db_path)
-        conn = sqlite3.connect(TodoDB.DB_PATH)
-        with conn:
-            # Enable foreign key constraints
-            conn.execute("PRAGMA foreign_keys = ON;")
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS projects (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT
-                )
-            """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    status TEXT CHECK(status IN ('complete', 'open', 'cancelled')) NOT NULL DEFAULT 'open',
-                    creation_date TEXT NOT NULL,
-                    due_date TEXT,
-                    close_date TEXT,
-                    project_id INTEGER,
-                    comments TEXT,
-                    FOREIGN KEY(project_id) REFERENCES projects(id) ON DELETE CASCADE
+    def _should_interrupt() -> bool:
+        token = current_token()
+        return token is not None and token.should_stop()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        # Abort queries whose job was cancelled or timed out (see cancellation)
+        conn.set_progress_handler(self._should_interrupt, self.PROGRESS_INTERVAL)
+        return conn
+
+    def _submit(self, request: _WriteRequest) -> sqlite3.Connection:
+        """Queue a request and wait until the writer thread lends the connection."""
+        with self._start_lock:
+            self._check_open()
+            if self._writer_thread is None:
+                self._writer = self._connect()
+                self._writer.execute("PRAGMA journal_mode = WAL;")
+                self._writer_thread = threading.Thread(
+                    target=self._write_loop, name="TodoDB writer", daemon=True
                 )
-            """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS files (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    filename TEXT NOT NULL,
-                    data BLOB NOT NULL,
-                    task_id INTEGER,
-                    FOREIGN KEY(task_id) REFERENCES tasks(id) ON DELETE CASCADE
-                    )
-                """)
-        conn.close()
+                self._writer_thread.start()
+            self._requests.put(request)
+        request.ready.wait()
+        if request.error is not None:
+            raise request.error
+        return self._writer
 
     @contextmanager
-    def _get_conn_cursor(self):
-        conn = sqlite3.connect(TodoDB.DB_PATH)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        cursor = conn.cursor()
+    def _lend(self, transactional: bool):
+        lent = getattr(self._lent, "conn", None)
+        if lent is not None:
+            # Nested block: join what this thread already holds
+            yield lent
+            return
+        request = _WriteRequest(transactional)
+        conn = self._submit(request)
+        self._lent.conn = conn
+        try:
+            yield conn
+        except BaseException:
+            request.failed = True
+            raise
+        finally:
+            self._lent.conn = None
+            request.released.set()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+
+    def writer(self):
+        """Hold the writer connection exclusively, outside of any transaction."""
+        return self._lend(transactional=False)
+
+    def transaction(self):
+        """Yield the writer connection; the block's writes are committed on exit.
+
+        Nested blocks on the same thread join the enclosing one. An exception
+        undoes the block's writes, but not those of other callers committed
+        together with it.
+        """
+        return self._lend(transactional=True)
+
+    def _write_loop(self):
+        conn = self._writer
+        carry = None
+        stopping = False  # The close() sentinel ended the last batch
+        while not stopping:
+            request = carry or self._requests.get()
+            carry = None
+            if request is None:
+                break
+            if not request.transactional:
+                request.ready.set()
+                request.released.wait()
+                request.done.set()
+                continue
+
+            batch = [request]
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                if not request.transactional:
+                    carry = request
+                    break
+                batch.append(request)
+            self._run_batch(conn, batch)
+        conn.close()
+
+    def _run_batch(self, conn: sqlite3.Connection, batch: List[_WriteRequest]):
         try:
-            yield conn, cursor
+            # Take the database write lock up front, so no other process can
+            # commit between reading the table versions and our own writes
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.read_table_versions(conn)
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            raise e
+            for request in batch:
+                request.error = e
+                request.ready.set()
+                request.done.set()
+            return
+
+        error = None
+        try:
+            for request in batch:
+                conn.execute("SAVEPOINT write_request")
+                request.ready.set()
+                request.released.wait()
+                if request.failed:
+                    conn.execute("ROLLBACK TO write_request")
+                conn.execute("RELEASE write_request")
+            after = self.read_table_versions(conn)
+            conn.commit()
+            for name, version in after.items():
+                bumps = version - before.get(name, version)
+                self.local_bumps[name] = self.local_bumps.get(name, 0) + bumps
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            error = e
+        for request in batch:
+            request.error = error
+            request.ready.set()  # Requests after a failure never got their turn
+            request.done.set()
+
+    @staticmethod
+    def read_table_versions(conn: sqlite3.Connection) -> Dict[str, int]:
+        """Return the table_versions change counters as {table: version}."""
+        try:
+            return dict(conn.execute("SELECT name, version FROM table_versions"))
+        except sqlite3.OperationalError:
+            return {}  # Not migrated yet
+
+    @contextmanager
+    def reader(self):
+        """Yield an idle reader connection, opening a new one if none is free.
+
+        A thread holding the writer connection reads through it instead, so
+        it sees its own uncommitted writes and those batched before them.
+        """
+        lent = getattr(self._lent, "conn", None)
+        if lent is not None:
+            yield lent
+            return
+        with self._readers_lock:
+            self._check_open()
+            conn = self._readers.pop() if self._readers else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
         finally:
-            cursor.close()
+            with self._readers_lock:
+                if self._closed:
+                    conn.close()
+                else:
+                    self._readers.append(conn)
+
+    def close(self):
+        """Stop the writer thread and close every pooled connection.
+
+        Writes already queued still run first. Their blocks may query or
+        look up the manager again, so no lock is held while waiting for them.
+        """
+        with self._start_lock, self._readers_lock:
+            self._closed = True
+            readers, self._readers = self._readers, []
+            writer_thread, self._writer_thread = self._writer_thread, None
+            if writer_thread is not None:
+                self._requests.put(None)  # Behind the queued requests
+        for conn in readers:
             conn.close()
+        if writer_thread is not None:
+            writer_thread.join()
+            self._writer = None
+
+
+class TodoDB:
+    DB_PATH = Path(__file__).parent.parent / "todo.db"
+    BLOB_CHUNK_SIZE = 64 * 1024
+    # Incremental BLOB I/O (Connection.blobopen) needs Python 3.11
+    HAS_BLOB_IO = hasattr(sqlite3.Connection, "blobopen")
+
+    _manager = None
+    _manager_lock = threading.Lock()
+
+    @staticmethod
+    def connections() -> ConnectionManager:
+        """Return the connection manager for the current DB_PATH.
+
+        A thread holding the writer connection keeps getting its manager, so
+        a write queued before a close or a path change can still finish.
+        """
+        with TodoDB._manager_lock:
+            manager = previous = TodoDB._manager
+            if manager is not None and manager.holds_writer():
+                return manager
+            if (
+                manager is None
+                or manager.closed
+                or manager.db_path != Path(TodoDB.DB_PATH)
+            ):
+                manager = TodoDB._manager = ConnectionManager(TodoDB.DB_PATH)
+        if previous is not None and previous is not manager:
+            previous.close()
+        return manager
+
+    @staticmethod
+    def close():
+        """Close all open connections; they are reopened lazily on next use."""
+        with TodoDB._manager_lock:
+            manager = TodoDB._manager
+        # Replaced by the next connections() call, once closed
+        if manager is not None:
+            manager.close()
 
-    def fetch_all(self, query: str, params: Tuple[Any, ...] = ()) -> List[Tuple]:
+    @staticmethod
+    def init_db(db_path=None):
+        if db_path is not None:
+            TodoDB.DB_PATH = Path(db_path)
+        with TodoDB.connections().writer() as conn:
+            # The base tables are schema version 0, everything later is a migration
+            if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+                with conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS projects (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            name TEXT NOT NULL,
+                            description TEXT
+                        )
+                    """)
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS tasks (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            title TEXT NOT NULL,
+                            status TEXT CHECK(status IN ('complete', 'open', 'cancelled')) NOT NULL DEFAULT 'open',
+                            creation_date TEXT NOT NULL,
+                            due_date TEXT,
+                            close_date TEXT,
+                            project_id INTEGER,
+                            comments TEXT,
+                            FOREIGN KEY(project_id) REFERENCES projects(id) ON DELETE CASCADE
+                        )
+                    """)
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS files (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            filename TEXT NOT NULL,
+                            data BLOB NOT NULL,
+                            task_id INTEGER,
+                            FOREIGN KEY(task_id) REFERENCES tasks(id) ON DELETE CASCADE
+                            )
+                        """)
+            TodoDB._migrate(conn)
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Bring the schema up to date, one transaction per migration."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.execute("BEGIN")
+            try:
+                if callable(migration):
+                    migration(conn)
+                else:
+                    for statement in migration:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {target}")
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    @contextmanager
+    def _get_conn_cursor(self, write=False):
+        manager = TodoDB.connections()
+        with manager.transaction() if write else manager.reader() as conn:
+            cursor = conn.cursor()
+            try:
+                yield conn, cursor
+            except sqlite3.Error:
+                # An interrupted query surfaces as JobCancelled/TimeoutError
+                check_current()
+                raise
+            finally:
+                cursor.close()
+
+    def fetch_all(
+        self, query: str, params: Union[Tuple[Any, ...], Dict[str, Any]] = ()
+    ) -> List[Tuple]:
         """Run a SELECT query and return all rows."""
         with self._get_conn_cursor() as (conn, cur):
             cur.execute(query, params)
             return cur.fetchall()
 
-    def persist(self, query: str, params: Tuple[Any, ...] = ()) -> None:
-        """Run an INSERT (or any write) query and commit."""
-        with self._get_conn_cursor() as (conn, cur):
+    def persist(self, query: str, params: Tuple[Any, ...] = ()) -> int:
+        """Run an INSERT (or any write) query, commit and return the last row id."""
+        with self._get_conn_cursor(write=True) as (conn, cur):
             cur.execute(query, params)
-            conn.commit()
+            return cur.lastrowid
+
+    def persist_many(
+        self, query: str, seq_of_params: Iterable[Tuple[Any, ...]]
+    ) -> None:
+        """Run a write query once per parameter tuple and commit them together."""
+        with self._get_conn_cursor(write=True) as (conn, cur):
+            cur.executemany(query, seq_of_params)
+
+    @contextmanager
+    def transaction(self):
+        """Group the persist calls made inside the block into a single commit."""
+        with self._get_conn_cursor(write=True):
+            yield self
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the writer connection for the block, outside of any transaction.
+
+        No other write runs until the block ends; queries in it read through
+        the writer connection.
+        """
+        with TodoDB.connections().writer():
+            yield self
+
+    @classmethod
+    def _copy_stream(
+        cls, stream: BinaryIO, size: int, write: Callable[[bytes], Any]
+    ) -> None:
+        """Pass size bytes of stream to write, BLOB_CHUNK_SIZE bytes at a time."""
+        remaining = size
+        while remaining > 0:
+            chunk = stream.read(min(cls.BLOB_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError(f"Stream ended {remaining} of {size} bytes short")
+            write(chunk)
+            remaining -= len(chunk)
+
+    def persist_blob(
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+        table: str,
+        column: str,
+        stream: BinaryIO,
+        size: int,
+    ) -> int:
+        """Run an INSERT that stores zeroblob(size) and stream the data into it.
+
+        The stream is copied BLOB_CHUNK_SIZE bytes at a time, so the data is
+        never held in memory as a whole. Without HAS_BLOB_IO the data is bound
+        in a single statement instead, so size may not exceed BLOB_CHUNK_SIZE
+        (ValueError). Raises IOError, writing nothing, if the stream ends
+        before size bytes. Returns the new row id.
+        """
+        if not self.HAS_BLOB_IO and size > self.BLOB_CHUNK_SIZE:
+            raise ValueError(
+                f"Storing {size} bytes needs incremental BLOB I/O (Python 3.11+)"
+            )
+        with self._get_conn_cursor(write=True) as (conn, cur):
+            cur.execute(query, params)
+            rowid = cur.lastrowid
+            if self.HAS_BLOB_IO:
+                with conn.blobopen(table, column, rowid) as blob:
+                    self._copy_stream(stream, size, blob.write)
+            else:
+                self._copy_stream(
+                    stream,
+                    size,
+                    lambda chunk: cur.execute(
+                        f"UPDATE {table} SET {column} = ? WHERE rowid=?",
+                        (chunk, rowid),
+                    ),
+                )
+            return rowid
+
+    def iter_blob(
+        self,
+        table: str,
+        column: str,
+        rowid: int,
+        offset: int = 0,
+        length: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """Yield a BLOB in chunks, starting at offset and stopping after length bytes.
+
+        Without HAS_BLOB_IO each chunk is a substr() query, which loads the
+        whole value; persist_blob keeps such BLOBs to a single chunk.
+        """
+        with self._get_conn_cursor() as (conn, cur):
+            if self.HAS_BLOB_IO:
+                with conn.blobopen(table, column, rowid, readonly=True) as blob:
+                    end = (
+                        len(blob) if length is None else min(len(blob), offset + length)
+                    )
+                    blob.seek(min(offset, end))
+                    while blob.tell() < end:
+                        check_current()
+                        yield blob.read(min(self.BLOB_CHUNK_SIZE, end - blob.tell()))
+                return
+
+            # No incremental BLOB I/O before Python 3.11: read it with substr()
+            row = cur.execute(
+                f"SELECT length({column}) FROM {table} WHERE rowid=?", (rowid,)
+            ).fetchone()
+            if row is None:
+                raise sqlite3.OperationalError(f"no such rowid: {rowid}")
+            end = row[0] if length is None else min(row[0], offset + length)
+            position = min(offset, end)
+            while position < end:
+                check_current()
+                chunk = cur.execute(
+                    f"SELECT substr({column}, ?, ?) FROM {table} WHERE rowid=?",
+                    (position + 1, min(self.BLOB_CHUNK_SIZE, end - position), rowid),
+                ).fetchone()[0]
+                if not chunk:
+                    break
+                yield chunk
+                position += len(chunk)
@@ -0,0 +1,42 @@
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QFontDatabase
+from PySide6.QtWidgets import QDialog, QPlainTextEdit, QPushButton, QVBoxLayout
+
+from LMTodo.models.job_metrics import job_metrics
+
+
+class JobMetricsDialog(QDialog):
+    """Hidden debug panel listing the background job timings (see job_metrics)."""
+
+    REFRESH_INTERVAL = 1000  # ms
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Job metrics")
+        self.resize(820, 420)
+        layout = QVBoxLayout()
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.text)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+        self.setLayout(layout)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        self.text.setPlainText(job_metrics.format_table())
+
+    def showEvent(self, event):
+        self.refresh()
+        self._timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
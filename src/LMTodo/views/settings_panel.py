@@ -1,5 +1,6 @@
 import os
 import shutil
+from contextlib import nullcontext
 
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QKeySequence
@@ -19,7 +20,14 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from LMTodo.controllers.todo_controller import init_db, update_db_path
+from LMTodo.controllers.todo_controller import (
+    attachment_dir,
+    close_db,
+    export_tasks_csv,
+    init_db,
+    update_db_path,
+)
+from LMTodo.models.qthread_helper import start_job
 from LMTodo.views.translations import translate
 from LMTodo.views.widgets import BubbleWidget
 
@@ -303,6 +311,11 @@ class SettingsPanel(QFrame):
         self.change_db_btn = QPushButton(translate("Change"))
         self.change_db_btn.clicked.connect(self.change_db_location)
         db_path_layout.addWidget(self.change_db_btn)
+        # Export Tasks Button
+        self.export_btn = QPushButton(translate("Export"))
+        self.export_btn.setToolTip(translate("Export tasks to CSV"))
+        self.export_btn.clicked.connect(self.export_tasks)
+        db_path_layout.addWidget(self.export_btn)
         layout.addLayout(db_path_layout)
 
         # Current DB Path Display
@@ -537,6 +550,41 @@ class SettingsPanel(QFrame):
     def _get_subtitle_style(self):
         return "font-size: 14px; font-weight: bold;"
 
+    def export_tasks(self):
+        """Export every task to a CSV file in a worker process."""
+        dest_path, _ = QFileDialog.getSaveFileName(
+            self, translate("Export tasks to CSV"), "tasks.csv", "CSV Files (*.csv)"
+        )
+        if not dest_path:
+            return
+
+        def on_progress(done, total):
+            if total:
+                self.export_btn.setText(f"{translate('Export')} {done * 100 // total}%")
+
+        def on_done(count):
+            self.export_btn.setText(translate("Export"))
+            self.export_btn.setEnabled(True)
+            QMessageBox.information(
+                self,
+                translate("Success"),
+                translate("Exported {count} tasks.").format(count=count),
+            )
+
+        def on_error(error):
+            self.export_btn.setText(translate("Export"))
+            self.export_btn.setEnabled(True)
+            QMessageBox.critical(self, translate("Error"), str(error))
+
+        self.export_btn.setEnabled(False)
+        start_job(
+            export_tasks_csv,
+            on_done,
+            dest_path,
+            error_callback=on_error,
+            progress_callback=on_progress,
+        )
+
     def change_db_location(self):
         """Open a file dialog to select a new database location."""
         new_path, _ = QFileDialog.getSaveFileName(
@@ -566,19 +614,31 @@ class SettingsPanel(QFrame):
                 if reply == QMessageBox.Cancel:
                     return
 
-                if reply == QMessageBox.Yes:
-                    try:
-                        shutil.move(current_db_path, new_path)
-                        update_db_path(new_path)
-                    except Exception as e:
-                        QMessageBox.critical(
-                            self,
-                            translate("Error"),
-                            f"{translate('Failed to move database')}: {e}",
-                        )
-                        return
-                if reply == QMessageBox.No:
-                    init_db(new_path)
+                # The watcher's connection has to be closed as well, and no
+                # poll may reopen the old file while it is moved
+                db_watcher = getattr(self._parent, "db_watcher", None)
+                with db_watcher.paused() if db_watcher else nullcontext():
+                    if reply == QMessageBox.Yes:
+                        try:
+                            # Release the pooled connections so the WAL is checkpointed
+                            # into the main file before it is moved.
+                            close_db()
+                            shutil.move(current_db_path, new_path)
+                            if attachment_dir(current_db_path).is_dir():
+                                shutil.move(
+                                    attachment_dir(current_db_path),
+                                    attachment_dir(new_path),
+                                )
+                            update_db_path(new_path)
+                        except Exception as e:
+                            QMessageBox.critical(
+                                self,
+                                translate("Error"),
+                                f"{translate('Failed to move database')}: {e}",
+                            )
+                            return
+                    if reply == QMessageBox.No:
+                        init_db(new_path)
 
             # Update the configuration with the new path
             self.config_parser.save_db_path(new_path)
@@ -0,0 +1,408 @@
+import bisect
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QEvent,
+    QModelIndex,
+    QRect,
+    QSize,
+    Qt,
+    Signal,
+)
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPalette
+from PySide6.QtWidgets import (
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QToolTip,
+)
+
+from LMTodo.models.task_store import date_ordinal, today_ordinal
+from LMTodo.views.translations import translate
+
+TASK_ROLE = Qt.UserRole  # The whole task tuple
+PROJECT_NAME_ROLE = Qt.UserRole + 1
+
+
+def _increasing_subsequence(values):
+    """Return a longest strictly increasing subsequence of values, as a set."""
+    tails = []  # tails[k]: index of the smallest end of a run of length k + 1
+    tail_values = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        k = bisect.bisect_left(tail_values, value)
+        if k:
+            previous[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[k] = i
+            tail_values[k] = value
+    result = set()
+    i = tails[-1] if tails else None
+    while i is not None:
+        result.add(values[i])
+        i = previous[i]
+    return result
+
+
+class TaskListModel(QAbstractListModel):
+    """List model over the displayed task tuples, in display order."""
+
+    MAX_MOVES = 100  # Past this many moved rows update_tasks resets instead
+
+    def __init__(self, project_name_func=None, parent=None):
+        super().__init__(parent)
+        self._tasks = []
+        self._snippets = {}  # {task_id: search snippet}, shown as tooltip
+        self._project_name_func = project_name_func
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._tasks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self._tasks[index.row()]
+        if role == Qt.DisplayRole:
+            return task[1]
+        if role == TASK_ROLE:
+            return task
+        if role == PROJECT_NAME_ROLE:
+            if callable(self._project_name_func):
+                return self._project_name_func(task[6])
+            return ""
+        if role == Qt.ToolTipRole:
+            return self._snippets.get(task[0])
+        return None
+
+    def task(self, row):
+        return self._tasks[row]
+
+    def set_tasks(self, tasks, snippets=None):
+        """Replace every row."""
+        self.beginResetModel()
+        self._tasks = list(tasks)
+        self._snippets = snippets or {}
+        self.endResetModel()
+
+    def update_tasks(self, tasks, snippets=None):
+        """Change the rows to tasks with as few row operations as possible.
+
+        Rows are matched by task id: rows of tasks that are gone are removed,
+        reordered ones moved, new ones inserted and edited ones updated, so
+        the view keeps its scroll position and selection. Returns False if
+        the rows were reset instead, because more than MAX_MOVES would move
+        (e.g. after a sort change).
+        """
+        old_rows = {task[0]: row for row, task in enumerate(self._tasks)}
+        kept = [old_rows[task[0]] for task in tasks if task[0] in old_rows]
+        # Rows outside a longest run already in the right order have to move
+        in_order = _increasing_subsequence(kept)
+        if len(kept) - len(in_order) > self.MAX_MOVES:
+            self.set_tasks(tasks, snippets)
+            return False
+        moved = {self._tasks[row][0] for row in kept if row not in in_order}
+
+        self._snippets = snippets or {}
+
+        # Remove the rows of tasks that are gone, one run at a time
+        new_ids = {task[0] for task in tasks}
+        row = len(self._tasks)
+        while row > 0:
+            end = row
+            while row > 0 and self._tasks[row - 1][0] not in new_ids:
+                row -= 1
+            if row < end:
+                self.remove_tasks(row, end - row)
+            else:
+                row -= 1
+
+        # Move each out of order row right after its predecessor in tasks
+        ids = [task[0] for task in self._tasks]
+        previous = None
+        for task in tasks:
+            if task[0] not in old_rows:
+                continue
+            if task[0] in moved:
+                source = ids.index(task[0])
+                target = ids.index(previous) + 1 if previous is not None else 0
+                if target not in (source, source + 1):
+                    self.beginMoveRows(
+                        QModelIndex(), source, source, QModelIndex(), target
+                    )
+                    if target > source:
+                        target -= 1
+                    self._tasks.insert(target, self._tasks.pop(source))
+                    ids.insert(target, ids.pop(source))
+                    self.endMoveRows()
+            previous = task[0]
+
+        # The kept rows are now in order; insert the new tasks between them
+        row = 0
+        while row < len(tasks):
+            task = tasks[row]
+            if task[0] in old_rows:
+                if self._tasks[row] != task:
+                    self.set_task(row, task)
+                row += 1
+                continue
+            end = row + 1
+            while end < len(tasks) and tasks[end][0] not in old_rows:
+                end += 1
+            self.insert_tasks(row, tasks[row:end])
+            row = end
+        return True
+
+    def refresh(self, task_ids=None):
+        """Repaint the rows of task_ids, or every row (e.g. after a rename)."""
+        if task_ids is None:
+            if self._tasks:
+                self.dataChanged.emit(self.index(0), self.index(len(self._tasks) - 1))
+            return
+        for row, task in enumerate(self._tasks):
+            if task[0] in task_ids:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def insert_tasks(self, row, tasks):
+        if not tasks:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(tasks) - 1)
+        self._tasks[row:row] = tasks
+        self.endInsertRows()
+
+    def remove_tasks(self, row, count=1):
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        del self._tasks[row : row + count]
+        self.endRemoveRows()
+
+    def set_task(self, row, task):
+        self._tasks[row] = task
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+
+class TaskItemDelegate(QStyledItemDelegate):
+    """Paints a task row as a card: the title with the comments and
+    attachments buttons, then the dates, status and project name.
+
+    Nothing is built per row, so only the rows in the viewport cost
+    anything. The button style option is allocated once and rebound for
+    every button, and each task's detail texts and colors are kept until
+    the task changes or becomes overdue, so repaints while scrolling mostly
+    reuse them. Due dates are compared with today, a day number the owner
+    moves on at midnight. Clicks on the painted buttons emit
+    comments_clicked and attachments_clicked with the task and the button's
+    rect in viewport coordinates, to anchor a bubble to.
+    """
+
+    comments_clicked = Signal(object, QRect)
+    attachments_clicked = Signal(object, QRect)
+
+    MARGIN = 3  # Around the card, where the selection shows
+    PADDING = 10
+    SPACING = 6
+    BUTTON_WIDTH = 36
+    BUTTON_HEIGHT = 28
+    PROJECT_NAME_LENGTH = 16
+    MAX_CACHED_ROWS = 2048  # Detail texts kept; the cache starts over past it
+
+    BACKGROUND = QColor("#333333")
+    BORDER = QColor("#555555")
+    TITLE = QColor("#ffffff")
+    MUTED = QColor("#cccccc")
+    GREEN = QColor("#00ff00")
+    RED = QColor("#ff4444")
+    YELLOW = QColor("#ffaa00")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = QFont("Arial", 11, QFont.Bold)
+        self._title_metrics = QFontMetrics(self.title_font)
+        self._labels = {
+            key: translate(key)
+            for key in ("Created", "Due", "Closed", "Status", "Comments", "Attachments")
+        }
+        self._statuses = {
+            status: translate(status) for status in ("open", "complete", "cancelled")
+        }
+        self._button = QStyleOptionButton()
+        self._button.state = QStyle.State_Enabled | QStyle.State_Raised
+        self._button_palettes = {}  # {(palette cache key, text color): palette}
+        self._details_cache = {}  # {(task, project name, overdue): details}
+        self.today = today_ordinal()
+
+    def sizeHint(self, option, index):
+        title_height = max(self._title_metrics.height(), self.BUTTON_HEIGHT)
+        height = (
+            2 * (self.MARGIN + self.PADDING)
+            + title_height
+            + self.SPACING
+            + option.fontMetrics.height()
+        )
+        return QSize(option.rect.width(), height)
+
+    def _button_rects(self, rect):
+        """Return the (comments, attachments) button rects of a row."""
+        card = rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        attachments = QRect(
+            card.right() - self.PADDING - self.BUTTON_WIDTH + 1,
+            card.top() + self.PADDING,
+            self.BUTTON_WIDTH,
+            self.BUTTON_HEIGHT,
+        )
+        comments = attachments.translated(-self.BUTTON_WIDTH - self.SPACING, 0)
+        return comments, attachments
+
+    def _details(self, task, project_name):
+        """Return the (text, color) of the dates, status and project name."""
+        due_day = date_ordinal(task[4])
+        # Only the overdue flag depends on the day, so a new day leaves the
+        # rows of tasks that did not become overdue cached
+        overdue = due_day is None or due_day < self.today
+        key = (task, project_name, overdue)
+        details = self._details_cache.get(key)
+        if details is None:
+            if len(self._details_cache) >= self.MAX_CACHED_ROWS:
+                self._details_cache.clear()
+            details = self._details_cache[key] = self._build_details(
+                task, project_name, overdue
+            )
+        return details
+
+    def _build_details(self, task, project_name, overdue):
+        _tid, _title, status, creation_date, due_date, close_date = task[:6]
+        due_color = self.MUTED
+        if status == "open":
+            # Colorize due date based on on-time or overdue
+            due_color = self.RED if overdue else self.YELLOW
+        close_color = self.MUTED
+        if status == "complete" and close_date:
+            # Colorize close date based on adherence to due date
+            close_day, due_day = date_ordinal(close_date), date_ordinal(due_date)
+            on_time = None not in (close_day, due_day) and close_day <= due_day
+            close_color = self.GREEN if on_time else self.RED
+        status_color = {"complete": self.GREEN, "cancelled": self.RED}.get(
+            status, self.YELLOW
+        )
+        if len(project_name) > self.PROJECT_NAME_LENGTH:
+            project_name = project_name[: self.PROJECT_NAME_LENGTH - 1]
+        labels = self._labels
+        return [
+            (f"{labels['Created']}: {creation_date}", self.MUTED),
+            (f"{labels['Due']}: {due_date}", due_color),
+            (f"{labels['Closed']}: {close_date or ''}", close_color),
+            (
+                f"{labels['Status']}: {self._statuses.get(status, status)}",
+                status_color,
+            ),
+            (project_name, self.MUTED),
+        ]
+
+    def _button_palette(self, palette, color):
+        key = (palette.cacheKey(), color.rgb() if color is not None else None)
+        button_palette = self._button_palettes.get(key)
+        if button_palette is None:
+            if len(self._button_palettes) >= 8:
+                self._button_palettes.clear()  # Stale after a palette change
+            button_palette = self._button_palettes[key] = QPalette(palette)
+            if color is not None:
+                button_palette.setColor(QPalette.ButtonText, color)
+        return button_palette
+
+    def _draw_button(self, painter, option, rect, text, color=None):
+        if option.widget is None:
+            return
+        button = self._button
+        button.rect = rect
+        button.text = text
+        button.palette = self._button_palette(option.palette, color)
+        option.widget.style().drawControl(
+            QStyle.CE_PushButton, button, painter, option.widget
+        )
+
+    def paint(self, painter, option, index):
+        task = index.data(TASK_ROLE)
+        title, comments = task[1], task[7]
+        painter.save()
+
+        # Selection and hover highlight, showing around the card
+        if option.widget is not None:
+            option.widget.style().drawPrimitive(
+                QStyle.PE_PanelItemViewItem, option, painter, option.widget
+            )
+
+        card = option.rect.adjusted(
+            self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN
+        )
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.BORDER)
+        painter.setBrush(self.BACKGROUND)
+        painter.drawRoundedRect(card, 8, 8)
+
+        comments_rect, attachments_rect = self._button_rects(option.rect)
+        left = card.left() + self.PADDING
+        title_rect = QRect(
+            left,
+            comments_rect.top(),
+            comments_rect.left() - self.SPACING - left,
+            self.BUTTON_HEIGHT,
+        )
+        painter.setFont(self.title_font)
+        painter.setPen(self.TITLE)
+        painter.drawText(
+            title_rect,
+            Qt.AlignLeft | Qt.AlignVCenter,
+            self._title_metrics.elidedText(title, Qt.ElideRight, title_rect.width()),
+        )
+        self._draw_button(
+            painter, option, comments_rect, "💬", self.GREEN if comments else None
+        )
+        self._draw_button(painter, option, attachments_rect, "📎")
+
+        # Dates, status and project name in equal columns
+        painter.setFont(option.font)
+        metrics = option.fontMetrics
+        width = (card.width() - 2 * self.PADDING) / 5
+        top = title_rect.bottom() + 1 + self.SPACING
+        details = self._details(task, index.data(PROJECT_NAME_ROLE))
+        for column, (text, color) in enumerate(details):
+            rect = QRect(int(left + column * width), top, int(width), metrics.height())
+            painter.setPen(color)
+            painter.drawText(
+                rect,
+                Qt.AlignCenter,
+                metrics.elidedText(text, Qt.ElideRight, rect.width()),
+            )
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (
+            event.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease)
+            and event.button() == Qt.LeftButton
+        ):
+            comments_rect, attachments_rect = self._button_rects(option.rect)
+            pos = event.position().toPoint()
+            for rect, clicked in (
+                (comments_rect, self.comments_clicked),
+                (attachments_rect, self.attachments_clicked),
+            ):
+                if rect.contains(pos):
+                    # Clicking a button does not select the row
+                    if event.type() == QEvent.MouseButtonRelease:
+                        clicked.emit(index.data(TASK_ROLE), rect)
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        comments_rect, attachments_rect = self._button_rects(option.rect)
+        for rect, label in (
+            (comments_rect, "Comments"),
+            (attachments_rect, "Attachments"),
+        ):
+            if rect.contains(event.pos()):
+                QToolTip.showText(event.globalPos(), self._labels[label], view)
+                return True
+        return super().helpEvent(event, view, option, index)
@@ -1,25 +1,64 @@
-from PySide6.QtCore import QDate
+from PySide6.QtCore import QDate, QDateTime, QItemSelectionModel, Qt, QTime, QTimer
 from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QFileDialog,
     QFrame,
     QHBoxLayout,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
+    QMessageBox,
     QPushButton,
+    QTextEdit,
     QVBoxLayout,
+    QWidget,
 )
 
 from LMTodo.controllers import todo_controller
 from LMTodo.models.qthread_helper import ThreadRunner
+from LMTodo.models.task_store import TaskStore, today_ordinal
+from LMTodo.views.task_list import TaskItemDelegate, TaskListModel
 from LMTodo.views.translations import translate
-from LMTodo.views.widgets import BubbleWidget, TaskBubble, TaskFilterWidget, TaskWidget
+from LMTodo.views.widgets import (
+    AttachmentBubble,
+    BubbleWidget,
+    BubbleWidgetV2,
+    TaskBubble,
+    TaskFilterWidget,
+)
+
+
+def _get_first_tasks_page(*args):
+    """Return get_tasks_page(*args) and a task revision no newer than the page."""
+    rev = todo_controller.get_tasks_rev()
+    return todo_controller.get_tasks_page(*args), rev
 
 
 class TaskPanel(QFrame):
+    PAGE_SIZE = 100  # Tasks fetched per page while scrolling
+    COMMENT_FLUSH_DELAY = 1000  # ms an edited comment waits before it is written
+    QUERY_TIMEOUT = 30  # seconds a task query may run before it is aborted
+    DAY_CHANGE_DELAY = 1000  # ms after midnight the tasks are reclassified
+
     def __init__(
         self, main_window, get_current_project_id_func, get_projects_func=None
     ):
         self.main_window = main_window
-        self.tasks = []
+        self.task_store = TaskStore()  # The loaded tasks
+        self.filtered_tasks = []  # The rows shown, in order
+        self._task_query = None
+        self._load_generation = 0  # Bumped by every full reload
+        self._reload_in_flight = False
+        self._reload_pending = False
+        self._reload_runner = None
+        self._page_runner = None  # Runs page fetches and syncs
+        self._next_page_key = None
+        self._page_loading = False  # A page or a sync is in flight
+        self._tasks_rev = None  # Revision task_store is synced to; None while searching
+        self._sync_requested = False
+        self._search_snippets = {}
+        # Comments saved but not written yet, {task_id: text}, and the task
+        # rows they replaced, restored if the write fails
+        self._pending_comments = {}
+        self._pending_comments_previous = {}
         self.get_current_project_id = get_current_project_id_func
         self.get_projects_func = get_projects_func
 
@@ -28,10 +67,23 @@ class TaskPanel(QFrame):
         self.setFrameShape(QFrame.StyledPanel)
         task_layout = QVBoxLayout()
 
-        self.filter_widget = TaskFilterWidget(self.display_filtered_tasks)
+        self.filter_widget = TaskFilterWidget(self.load_tasks)
         task_layout.addWidget(self.filter_widget)
-        self.task_list = QListWidget()
+        # Rows are painted by the delegate, so only visible ones cost anything
+        self.task_model = TaskListModel(self.task_store.project_name, self)
+        self.task_delegate = TaskItemDelegate(self)
+        self.task_delegate.comments_clicked.connect(self._on_comments_clicked)
+        self.task_delegate.attachments_clicked.connect(self._on_attachments_clicked)
+        self.task_list = QListView()
+        self.task_list.setModel(self.task_model)
+        self.task_list.setItemDelegate(self.task_delegate)
+        self.task_list.setUniformItemSizes(True)
+        self.task_list.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.task_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
         task_layout.addWidget(self.task_list)
+        # Stands in for a painted row button when anchoring a bubble to it
+        self._row_anchor = QWidget(self.task_list.viewport())
+        self._row_anchor.hide()
 
         task_bar = QHBoxLayout()
         self.add_task_btn = QPushButton("+")
@@ -57,180 +109,570 @@ class TaskPanel(QFrame):
         task_layout.addLayout(task_bar)
         self.setLayout(task_layout)
 
-        self.task_list.itemSelectionChanged.connect(self.set_task_buttons_state)
+        self._comment_timer = QTimer(self)
+        self._comment_timer.setSingleShot(True)
+        self._comment_timer.setInterval(self.COMMENT_FLUSH_DELAY)
+        self._comment_timer.timeout.connect(self.flush_comments)
+
+        # Moves On Time tasks that fall due to Overdue when the day changes
+        self._day_timer = QTimer(self)
+        self._day_timer.setSingleShot(True)
+        self._day_timer.setTimerType(Qt.PreciseTimer)  # Coarse drifts minutes a day
+        self._day_timer.timeout.connect(self.on_day_changed)
+        self._schedule_day_change()
+
+        self.task_list.selectionModel().selectionChanged.connect(
+            self.set_task_buttons_state
+        )
+        self.task_list.verticalScrollBar().valueChanged.connect(
+            self._fetch_more_if_needed
+        )
         self.set_task_buttons_state()
 
+    def _get_task_query(self):
+        """Return the (project_id, filter, sort method, search text) shown by the task list."""
+        sort_method = "creation"
+        try:
+            sort_method = self.filter_widget.get_sort_method()
+        except Exception:
+            sort_method = "creation"
+        return (
+            self.get_current_project_id(),
+            self.filter_widget.get_current_filter(),
+            sort_method,
+            self.filter_widget.get_search_text(),
+        )
+
     def load_tasks(self, result=None):
-        ThreadRunner(todo_controller.get_tasks, self.on_tasks_loaded).start()
+        """Reload the task list from its first page.
+
+        While a reload of the same query runs, further calls only mark one
+        more reload as pending; it starts when the running one returns, whose
+        now stale result is dropped. A different query (e.g. after switching
+        project) cancels the running reload instead. A refresh of the same
+        query fetches at least as many rows as are already loaded, so the
+        rows the user scrolled to stay in place.
+        """
+        query = self._get_task_query()
+        if self._reload_in_flight:
+            if query == self._task_query:
+                self._reload_pending = True
+                return
+            self._reload_runner.cancel()
+        self._reload_in_flight = True
+        self._reload_pending = False
+        if self._page_runner is not None:
+            self._page_runner.cancel()  # Pages and syncs of the old list
+            self._page_runner = None
+
+        limit = self.PAGE_SIZE
+        if query == self._task_query:
+            limit = max(limit, len(self.task_store))
+        self._task_query = query
+        self._load_generation += 1
+        self._next_page_key = None
+        self._page_loading = True
+
+        generation = self._load_generation
+        project_id, task_filter, sort_method, search_text = query
+        if search_text:
+            # Search results come ranked by relevance in a single page
+            self._reload_runner = ThreadRunner(
+                todo_controller.search_tasks,
+                lambda rows, generation=generation: self.on_search_loaded(
+                    rows, generation
+                ),
+                search_text,
+                project_id,
+                task_filter,
+                error_callback=lambda error, generation=generation: (
+                    self.on_tasks_load_failed(error, generation)
+                ),
+                timeout=self.QUERY_TIMEOUT,
+            ).start()
+            return
+
+        self._reload_runner = ThreadRunner(
+            _get_first_tasks_page,
+            lambda result, generation=generation: self.on_tasks_loaded(
+                result, generation
+            ),
+            None,
+            limit,
+            task_filter,
+            sort_method,
+            project_id,
+            error_callback=lambda error, generation=generation: (
+                self.on_tasks_load_failed(error, generation)
+            ),
+            timeout=self.QUERY_TIMEOUT,
+        ).start()
+
+    def fetch_more_tasks(self):
+        """Fetch the page after the last loaded task, if there is one."""
+        if self._page_loading or self._next_page_key is None:
+            return
+        self._page_loading = True
+
+        generation = self._load_generation
+        project_id, task_filter, sort_method, _search_text = self._task_query
+        self._page_runner = ThreadRunner(
+            todo_controller.get_tasks_page,
+            lambda result, generation=generation: self.on_tasks_page_loaded(
+                result, generation
+            ),
+            self._next_page_key,
+            self.PAGE_SIZE,
+            task_filter,
+            sort_method,
+            project_id,
+            error_callback=lambda error, generation=generation: (
+                self.on_tasks_page_failed(error, generation)
+            ),
+            timeout=self.QUERY_TIMEOUT,
+        ).start()
+
+    def show_loaded_tasks(self, query, page, rev):
+        """Show a first page of tasks that was fetched for query elsewhere.
+
+        Falls back to load_tasks if the panel no longer shows that query.
+        """
+        if self._reload_in_flight or query != self._get_task_query():
+            self.load_tasks()
+            return
+        self._task_query = query
+        self._load_generation += 1
+        self._apply_loaded_tasks(page, rev)
+
+    def _finish_reload(self):
+        """Mark the running reload as done; False if a pending one replaces it."""
+        self._reload_in_flight = False
+        if self._reload_pending:
+            self._reload_pending = False
+            self.load_tasks()
+            return False
+        return True
 
-    def on_tasks_loaded(self, tasks):
-        self.tasks = tasks
+    def on_tasks_loaded(self, result, generation=None):
+        if generation != self._load_generation:
+            return  # A newer reload replaced this one
+        if not self._finish_reload():
+            return
+        page, rev = result
+        self._apply_loaded_tasks(page, rev)
+
+    def _apply_loaded_tasks(self, result, rev):
+        if rev is not None:
+            self._search_snippets = {}  # Not a search (see on_search_loaded)
+        tasks, self._next_page_key = result
+        sort_method = self._task_query[2]
+        self.task_store.reset(
+            [self._with_pending_comments(task) for task in tasks],
+            # Search results keep their ranking
+            (
+                None
+                if rev is None
+                else lambda task: todo_controller.task_sort_key(task, sort_method)
+            ),
+        )
+        self._tasks_rev = rev
+        self._page_loading = False
         self.display_filtered_tasks()
+        self._run_requested_sync()
+        self._fetch_more_if_needed()
+
+    def on_search_loaded(self, rows, generation=None):
+        if generation != self._load_generation:
+            return  # A newer reload replaced this one
+        if not self._finish_reload():
+            return
+        # Each row is a task tuple followed by a snippet of the matching text
+        self._search_snippets = {row[0]: row[-1] for row in rows}
+        self._apply_loaded_tasks(([row[:-1] for row in rows], None), None)
+
+    def on_tasks_load_failed(self, error, generation=None):
+        if generation != self._load_generation:
+            return  # A newer reload replaced this one
+        if not self._finish_reload():
+            return
+        self._page_loading = False
+        # Show no rows rather than those of the previous query; the next sync
+        # reloads them
+        self._search_snippets = {}
+        self._next_page_key = None
+        self._tasks_rev = None
+        self.task_store.reset([])
+        self.display_filtered_tasks()
+        QMessageBox.critical(
+            self,
+            translate("Error"),
+            f"{translate('Failed to load tasks')}:\n{error}",
+        )
+
+    def on_tasks_page_loaded(self, result, generation=None):
+        if generation != self._load_generation:
+            return  # A newer reload replaced this one
+        self._page_runner = None
+        tasks, self._next_page_key = result
+        tasks = [self._with_pending_comments(task) for task in tasks]
+        self._page_loading = False
+        self.task_store.extend(tasks)
+        self.filtered_tasks.extend(tasks)
+        self.task_model.insert_tasks(self.task_model.rowCount(), tasks)
+        self._run_requested_sync()
+        self._fetch_more_if_needed()
+
+    def on_tasks_page_failed(self, error, generation=None):
+        if generation != self._load_generation:
+            return  # A newer reload replaced this one
+        self._page_runner = None
+        self._page_loading = False
+        QMessageBox.critical(
+            self,
+            translate("Error"),
+            f"{translate('Failed to load tasks')}:\n{error}",
+        )
+        self._run_requested_sync()
+
+    def sync_tasks(self, result=None):
+        """Patch the loaded tasks with the changes made since they were fetched.
+
+        Only the added, edited and deleted tasks are fetched and only their
+        rows are replaced. Search results are reloaded instead, since their
+        order depends on the ranking of every match.
+        """
+        if self._page_loading:
+            # Queries run one at a time so each change applies on top of the last
+            self._sync_requested = True
+            return
+        if self._tasks_rev is None:
+            self.load_tasks()
+            return
+        self._page_loading = True
+
+        generation = self._load_generation
+        project_id, task_filter, _sort_method, _search_text = self._task_query
+        self._page_runner = ThreadRunner(
+            todo_controller.get_tasks_changed_since,
+            lambda result, generation=generation: self.on_tasks_changed(
+                result, generation
+            ),
+            self._tasks_rev,
+            project_id,
+            task_filter,
+            error_callback=lambda error, generation=generation: (
+                self.on_tasks_sync_failed(error, generation)
+            ),
+            timeout=self.QUERY_TIMEOUT,
+        ).start()
+
+    def _run_requested_sync(self):
+        if self._sync_requested:
+            self._sync_requested = False
+            self.sync_tasks()
+
+    def on_tasks_changed(self, result, generation=None):
+        if generation != self._load_generation:
+            return  # A newer reload replaced this one
+        self._page_runner = None
+        self._page_loading = False
+        changes, self._tasks_rev = result
+        self._apply_task_changes(dict(changes))
+        self._run_requested_sync()
+        self._fetch_more_if_needed()
+
+    def on_tasks_sync_failed(self, error, generation=None):
+        if generation != self._load_generation:
+            return  # A newer reload replaced this one
+        self._page_runner = None
+        self._page_loading = False
+        self.load_tasks()  # Fall back to a full reload
+
+    def _apply_task_changes(self, changes):
+        """Replace the rows of the changed tasks ({task_id: task or None})."""
+        for task_id, task in changes.items():
+            if task is None:
+                # Deleted or no longer matching the filter
+                self.task_store.remove(task_id)
+                continue
+            task = self._with_pending_comments(task)
+            key = self.task_store.key(task)
+            if self._next_page_key is not None and key > self._next_page_key:
+                # Past the loaded rows; it comes with a later page
+                self.task_store.remove(task_id)
+                continue
+            self.task_store.put(task)
+        self.display_filtered_tasks()
+
+    def _schedule_day_change(self):
+        now = QDateTime.currentDateTime()
+        midnight = QDateTime(now.date().addDays(1), QTime(0, 0))
+        self._day_timer.start(max(now.msecsTo(midnight), 0) + self.DAY_CHANGE_DELAY)
+
+    def on_day_changed(self):
+        """Reclassify the loaded tasks for the new day.
+
+        Only the open tasks that just fell due change filter: they leave an
+        On Time list and their rows elsewhere turn red. An Overdue list is
+        reloaded, since the tasks joining it were never loaded.
+        """
+        self._schedule_day_change()
+        today = today_ordinal()
+        previous = self.task_store.today
+        if today == previous:
+            return  # The timer fired early
+        overdue = self.task_store.set_today(today)
+        self.task_delegate.today = today
+        task_filter = (self._task_query or (None, "All"))[1]
+        if today < previous:
+            # The clock went back; every due date may have changed side
+            self.task_model.refresh()
+            if task_filter in ("On Time", "Overdue"):
+                self.load_tasks()
+        elif task_filter == "Overdue":
+            self.load_tasks()
+        elif task_filter == "On Time":
+            self.display_filtered_tasks()
+            self._fetch_more_if_needed()
+        else:
+            self.task_model.refresh({task[0] for task in overdue})
+
+    def _fetch_more_if_needed(self, value=None):
+        # Load the next page once the user scrolls near the end of the list,
+        # or right away while the loaded rows do not fill the viewport yet.
+        scroll_bar = self.task_list.verticalScrollBar()
+        if scroll_bar.value() >= scroll_bar.maximum() - scroll_bar.pageStep():
+            self.fetch_more_tasks()
 
     def display_filtered_tasks(self):
+        """Bring the list rows in line with task_store, touching only changed rows.
+
+        The rows are the stored tasks matching the project and filter, picked
+        from the store's indexes, so rows whose optimistic update took them
+        out of the filter go away before the write is synced. Rows that stay
+        keep their selection through the model's row moves; only when the
+        model has to reset is the selection restored by id.
+        """
         prev_task_id = None
-        if self.task_list.selectedIndexes():
-            prev_task_id = self.filtered_tasks[self.task_list.currentRow()][0]
-
-        self.task_list.clear()
-        current_task_filter = (
-            self.filter_widget.get_current_filter()
-        )  # ["All", "On Time", "Overdue", "Open", "Finished", "Cancelled"]
-        self.filtered_tasks = []
-        for (
-            tid,
-            title,
-            status,
-            creation_date,
-            due_date,
-            close_date,
-            pid,
-            comments,
-        ) in self.tasks:
-            if self.do_task_must_be_shown(
-                self.get_current_project_id(),
-                current_task_filter,
-                tid,
-                title,
-                status,
-                creation_date,
-                due_date,
-                close_date,
-                pid,
-            ):
-                self.filtered_tasks.append(
-                    (
-                        tid,
-                        title,
-                        status,
-                        creation_date,
-                        due_date,
-                        close_date,
-                        pid,
-                        comments,
-                    )
+        prev_selected_ids = {task[0] for task in self.selected_tasks()}
+        current = self.task_list.currentIndex()
+        if prev_selected_ids and current.isValid():
+            prev_task_id = self.filtered_tasks[current.row()][0]
+
+        if callable(self.get_projects_func) and self.task_store.set_projects(
+            self.get_projects_func() or []
+        ):
+            self.task_model.refresh()  # A project was renamed
+        project_id, task_filter = (self._task_query or (None, "All"))[:2]
+        self.filtered_tasks = self.task_store.select(project_id, task_filter)
+        updated = self.task_model.update_tasks(
+            self.filtered_tasks, self._search_snippets
+        )
+
+        # Restore last selected Task(s) if possible
+        if not updated and prev_task_id is not None:
+            rows = {task[0]: row for row, task in enumerate(self.filtered_tasks)}
+            selection = self.task_list.selectionModel()
+            if prev_task_id in rows:
+                selection.setCurrentIndex(
+                    self.task_model.index(rows[prev_task_id]),
+                    QItemSelectionModel.SelectCurrent,
                 )
+            for tid in prev_selected_ids - {prev_task_id}:
+                if tid in rows:
+                    selection.select(
+                        self.task_model.index(rows[tid]), QItemSelectionModel.Select
+                    )
 
-        sort_method = "creation"
-        try:
-            sort_method = self.filter_widget.get_sort_method()
-        except Exception:
-            sort_method = "creation"
+        self.set_task_buttons_state()
 
-        if sort_method == "creation":
-            self.filtered_tasks.sort(key=lambda t: t[0])
-        elif sort_method == "due":
+    def _on_comments_clicked(self, task, rect):
+        self._row_anchor.setGeometry(rect)
+        self.open_comments(task[0], task[7], self._row_anchor)
+
+    def _on_attachments_clicked(self, task, rect):
+        self._row_anchor.setGeometry(rect)
+        self.open_attachments(task[0], self._row_anchor)
+
+    def _update_tasks_optimistically(self, updates, job_func, *args):
+        """Show updated task rows right away and write them in the background.
+
+        updates maps task ids to their new task tuples. If the write fails
+        the rows are put back and the error is shown; either way a sync then
+        reconciles the list with the database (dates set by SQL, filter and
+        sort order).
+        """
+        previous = self._apply_task_updates(updates)
+        self._write_task_updates(updates, previous, job_func, *args)
+
+    def _apply_task_updates(self, updates):
+        """Replace the loaded rows of the updated tasks and return the old rows."""
+        previous = {}
+        for task_id, task in updates.items():
+            if task_id in self.task_store:
+                previous[task_id] = self.task_store.get(task_id)
+                self.task_store.put(task)
+        self.display_filtered_tasks()
+        return previous
+
+    def _write_task_updates(self, updates, previous, job_func, *args):
+        """Run the write behind updates, restoring the previous rows if it fails."""
+
+        def on_error(error):
+            for task_id, task in previous.items():
+                # Leave rows alone that changed again in the meantime
+                if self.task_store.get(task_id) == updates[task_id]:
+                    self.task_store.put(task)
+            self.display_filtered_tasks()
+            QMessageBox.critical(
+                self,
+                translate("Error"),
+                f"{translate('Failed to save changes')}:\n{error}",
+            )
+            self.sync_tasks()
+
+        ThreadRunner(job_func, self.sync_tasks, *args, error_callback=on_error).start()
+
+    def _with_pending_comments(self, task):
+        if task[0] in self._pending_comments:
+            return task[:7] + (self._pending_comments[task[0]],)
+        return task
+
+    def save_task_comments(self, task_id, comments):
+        """Show the new comments of a task now and queue them for writing.
+
+        Unchanged comments are dropped, and repeated edits of a task within
+        COMMENT_FLUSH_DELAY are merged into a single write.
+        """
+        current = self.task_store.get(task_id)
+        if current is not None and (current[7] or "") == (comments or ""):
+            return
+        updates = {task_id: current[:7] + (comments,)} if current else {}
+        for tid, task in self._apply_task_updates(updates).items():
+            self._pending_comments_previous.setdefault(tid, task)
+        self._pending_comments[task_id] = comments
+        self._comment_timer.start()
+
+    def flush_comments(self, block=False):
+        """Write the queued comments in one transaction.
+
+        With block=True the write runs on the calling thread, for use on exit.
+        """
+        self._comment_timer.stop()
+        if not self._pending_comments:
+            return
+        comments = self._pending_comments
+        previous = self._pending_comments_previous
+        self._pending_comments = {}
+        self._pending_comments_previous = {}
+        if block:
+            todo_controller.update_task_comments_many(comments)
+            return
+
+        # Tasks that left the store since they were edited are not restored
+        updates = {
+            task_id: self.task_store.get(task_id)
+            for task_id in comments
+            if task_id in self.task_store
+        }
+        previous = {
+            task_id: task for task_id, task in previous.items() if task_id in updates
+        }
+        self._write_task_updates(
+            updates, previous, todo_controller.update_task_comments_many, comments
+        )
 
-            def due_key(t):
-                dd = t[4] or ""
-                return (dd == "", dd)
+    def open_comments(self, task_id, comments, anchor_btn):
+        """Show the comments of a task in an editable bubble anchored to anchor_btn.
 
-            self.filtered_tasks.sort(key=due_key)
-        elif sort_method == "status":
-            order = {"open": 0, "complete": 1, "cancelled": 2}
-            self.filtered_tasks.sort(key=lambda t: order.get(t[2], 99))
+        The text is saved when the bubble closes, if it was edited.
+        """
+        initial = comments or ""
 
-        for (
-            tid,
-            title,
-            status,
-            creation_date,
-            due_date,
-            close_date,
-            pid,
-            comments,
-        ) in self.filtered_tasks:
-
-            def _on_save_comments(tid_arg, text):
-                try:
-                    ThreadRunner(
-                        todo_controller.update_task_comments,
-                        self.load_tasks,
-                        tid_arg,
-                        text,
-                    ).start()
-                except Exception:
-                    pass
-
-            task_widget = TaskWidget(
-                self.main_window,
-                next(
-                    (
-                        second
-                        for first, second in self.get_projects_func()
-                        if first == pid
-                    ),
-                    None,
-                ),
-                tid,
-                title,
-                status,
-                due_date,
-                close_date,
-                creation_date,
-                comments,
-                on_save_comments=_on_save_comments,
+        def on_close(text):
+            # Compare with the opening text, not the stored one: a sync from
+            # another instance may have changed that while the bubble was open
+            if (text or "") != initial:
+                self.save_task_comments(task_id, text)
+
+        content_layout = QVBoxLayout()
+        comment_edit = QTextEdit()
+        comment_edit.setPlainText(initial)
+        comment_edit.setStyleSheet(
+            "background: #222; color: #f0f0f0; border-radius: 6px; padding: 6px;"
+        )
+        content_layout.addWidget(comment_edit)
+
+        bubble = BubbleWidgetV2(
+            self,
+            self.main_window,
+            content_layout,
+            anchor_btn,
+            anchor_point="top-right",
+            minWidth=840,
+            minHeight=173,
+            on_close=on_close,
+        )
+        bubble.resize(bubble.minimumWidth(), bubble.minimumHeight())
+        bubble.show()
+
+    def open_attachments(self, task_id, anchor_btn):
+        """Show the attachments of a task in a bubble anchored to anchor_btn."""
+
+        def refresh(result=None):
+            ThreadRunner(
+                todo_controller.get_attachments, on_attachments_loaded, task_id
+            ).start()
+
+        def on_attachments_loaded(attachments):
+            bubble.set_attachments(attachments)
+
+        def on_add():
+            path, _ = QFileDialog.getOpenFileName(
+                self.main_window, translate("Add Attachment")
             )
-            item = QListWidgetItem()
-            item.setSizeHint(task_widget.sizeHint())
-            self.task_list.addItem(item)
-            self.task_list.setItemWidget(item, task_widget)
-
-        # Restore last selected Task if possible
-        if prev_task_id is not None:
-            for index, (tid, _, _, _, _, _, _, _) in enumerate(self.filtered_tasks):
-                if tid == prev_task_id:
-                    self.task_list.setCurrentRow(index)
-                    break
+            if path:
+                ThreadRunner(
+                    todo_controller.add_attachment, refresh, task_id, path
+                ).start()
 
-        self.set_task_buttons_state()
+        def on_save(file_id, filename):
+            path, _ = QFileDialog.getSaveFileName(
+                self.main_window, translate("Save Attachment"), filename
+            )
+            if path:
+                ThreadRunner(
+                    todo_controller.save_attachment, None, file_id, path
+                ).start()
 
-    def do_task_must_be_shown(
-        self,
-        current_project_id,
-        current_task_filter,
-        tid,
-        title,
-        status,
-        creation_date,
-        due_date,
-        close_date,
-        pid,
-    ):
-        if not current_project_id == None and not current_project_id == pid:
-            return False
-        match current_task_filter:
-            case "On Time":
-                if not (
-                    status == "open"
-                    and QDate.fromString(due_date, "yyyy-MM-dd") >= QDate.currentDate()
-                ):
-                    return False
-            case "Overdue":
-                if not (
-                    status == "open"
-                    and QDate.fromString(due_date, "yyyy-MM-dd") < QDate.currentDate()
-                ):
-                    return False
-            case "Open":
-                if not status == "open":
-                    return False
-            case "Finished":
-                if not status == "complete":
-                    return False
-            case "Cancelled":
-                if not status == "cancelled":
-                    return False
-            case _:
-                ...
-        return True
+        def on_delete(file_id):
+            ThreadRunner(todo_controller.delete_attachment, refresh, file_id).start()
 
-    def set_task_buttons_state(self):
-        selected_task = self.task_list.currentRow()
-        is_task_selected = selected_task >= 0
+        bubble = AttachmentBubble(
+            self,
+            self.main_window,
+            anchor_btn,
+            on_add=on_add,
+            on_save=on_save,
+            on_delete=on_delete,
+        )
+        bubble.resize(bubble.minimumWidth(), bubble.minimumHeight())
+        bubble.show()
+        refresh()
+
+    def selected_tasks(self):
+        """Return the filtered task tuples of every selected row."""
+        return [
+            self.filtered_tasks[index.row()]
+            for index in self.task_list.selectionModel().selectedRows()
+        ]
 
-        # Enable or disable task buttons based on selection
-        self.edit_task_btn.setEnabled(is_task_selected)
+    def set_task_buttons_state(self, *args):
+        selected_count = len(self.task_list.selectionModel().selectedRows())
+        is_task_selected = selected_count > 0
+
+        # Enable or disable task buttons based on selection; edit works on one task only
+        self.edit_task_btn.setEnabled(selected_count == 1)
         self.delete_task_btn.setEnabled(is_task_selected)
         self.complete_task_btn.setEnabled(is_task_selected)
         self.cancel_task_btn.setEnabled(is_task_selected)
@@ -272,7 +714,7 @@ class TaskPanel(QFrame):
 
             if desc and project_id is not None:
                 ThreadRunner(
-                    todo_controller.add_task, self.load_tasks, desc, due, project_id
+                    todo_controller.add_task, self.sync_tasks, desc, due, project_id
                 ).start()
             bubble.close()
 
@@ -289,7 +731,7 @@ class TaskPanel(QFrame):
             close_date,
             project_id,
             comments,
-        ) = self.filtered_tasks[self.task_list.currentRow()]
+        ) = self.selected_tasks()[0]
 
         bubble = TaskBubble(
             self,
@@ -310,14 +752,26 @@ class TaskPanel(QFrame):
             desc = bubble.desc_input.text().strip()
             due = bubble.due_input.date().toString("yyyy-MM-dd")
             if desc:
-                ThreadRunner(
+                new_project_id = bubble.project_combo.currentData()
+                self._update_tasks_optimistically(
+                    {
+                        task_id: (
+                            task_id,
+                            desc,
+                            status,
+                            creation_date,
+                            due,
+                            close_date,
+                            new_project_id,
+                            comments,
+                        )
+                    },
                     todo_controller.edit_task,
-                    self.load_tasks,
                     task_id,
                     desc,
                     due,
-                    bubble.project_combo.currentData(),
-                ).start()
+                    new_project_id,
+                )
             bubble.close()
 
         bubble.action_btn.clicked.connect(on_save)
@@ -325,21 +779,19 @@ class TaskPanel(QFrame):
 
     def delete_task(self):
         # Get task details from filtered tasks
-        (
-            task_id,
-            title,
-            status,
-            creation_date,
-            due_date,
-            close_date,
-            project_id,
-            comments,
-        ) = self.filtered_tasks[self.task_list.currentRow()]
+        selected = self.selected_tasks()
+        if not selected:
+            return
+        task_ids = [task[0] for task in selected]
+        if len(selected) == 1:
+            message = f"{translate('Delete task')} '{selected[0][1]}'?"
+        else:
+            message = translate("Delete {count} tasks?").format(count=len(selected))
 
         # Confirmation bubble with two buttons, no input
         bubble = BubbleWidget(
             self,
-            f"{translate('Delete task')} '{title}'?",
+            message,
             translate("Delete"),
             self.delete_task_btn,
             show_input=False,
@@ -352,7 +804,14 @@ class TaskPanel(QFrame):
         bubble.move(btn_pos.x() - 10, btn_pos.y() - bubble.height() - 30)
 
         def on_confirm():
-            ThreadRunner(todo_controller.delete_task, self.load_tasks, task_id).start()
+            if len(task_ids) == 1:
+                ThreadRunner(
+                    todo_controller.delete_task, self.sync_tasks, task_ids[0]
+                ).start()
+            else:
+                ThreadRunner(
+                    todo_controller.delete_tasks, self.sync_tasks, task_ids
+                ).start()
             bubble.close()
 
         def on_cancel():
@@ -364,27 +823,34 @@ class TaskPanel(QFrame):
 
     def update_task_status(self, new_status):
         # Get task details from filtered tasks
-        (
-            task_id,
-            title,
-            status,
-            creation_date,
-            due_date,
-            close_date,
-            project_id,
-            comments,
-        ) = self.filtered_tasks[self.task_list.currentRow()]
-
-        if status != new_status:
-            # Update the task status
-            ThreadRunner(
-                todo_controller.update_task_status, self.load_tasks, task_id, new_status
-            ).start()
+        selected = self.selected_tasks()
+        if not selected:
+            return
+        # Toggle back to 'open' if every selected task already has the status
+        if all(task[2] == new_status for task in selected):
+            new_status = "open"
+        close_date = (
+            None if new_status == "open" else QDate.currentDate().toString("yyyy-MM-dd")
+        )
+        updates = {
+            task[0]: task[:2] + (new_status, task[3], task[4], close_date) + task[6:]
+            for task in selected
+        }
+
+        if len(selected) > 1:
+            self._update_tasks_optimistically(
+                updates,
+                todo_controller.update_task_status_many,
+                list(updates),
+                new_status,
+            )
         else:
-            # If the current status is the same as the new status, revert to 'open'
-            ThreadRunner(
-                todo_controller.update_task_status, self.load_tasks, task_id, "open"
-            ).start()
+            self._update_tasks_optimistically(
+                updates,
+                todo_controller.update_task_status,
+                selected[0][0],
+                new_status,
+            )
 
     def complete_task(self):
         self.update_task_status("complete")
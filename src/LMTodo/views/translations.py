@@ -62,6 +62,7 @@ translations = {
         "Do you want to move the current database to the new location?\n\n": "Do you want to move the current database to the new location?\n\n",
         "Warning: If you press 'No', a new database will be created at the new location, and all current information will be unavailable.": "Warning: If you press 'No', a new database will be created at the new location, and all current information will be unavailable.",
         "Failed to move database": "Failed to move database",
+        "Failed to open the database": "Failed to open the database",
         "Database location updated successfully.": "Database location updated successfully.",
         "Error": "Error",
         "Success": "Success",
@@ -88,6 +89,18 @@ translations = {
         "Shortcut cannot be empty.": "Shortcut cannot be empty.",
         "Invalid shortcut format.": "Invalid shortcut format.",
         "Shortcut already used by '{act}'.": "Shortcut already used by '{act}'.",
+        "Delete {count} tasks?": "Delete {count} tasks?",
+        "Attachments": "Attachments",
+        "Add Attachment": "Add Attachment",
+        "Save Attachment": "Save Attachment",
+        "Delete Attachment": "Delete Attachment",
+        "Search tasks": "Search tasks",
+        "Failed to save changes": "Failed to save changes",
+        "Failed to load tasks": "Failed to load tasks",
+        "Failed to load projects": "Failed to load projects",
+        "Export": "Export",
+        "Export tasks to CSV": "Export tasks to CSV",
+        "Exported {count} tasks.": "Exported {count} tasks.",
     },
     "pt": {
         "add_task": "Adicionar Tarefa",
@@ -147,6 +160,7 @@ translations = {
         "Do you want to move the current database to the new location?\n\n": "Deseja mover o banco de dados atual para o novo local?\n\n",
         "Warning: If you press 'No', a new database will be created at the new location, and all current information will be unavailable.": "Atenção: Se você pressionar 'Não', um novo banco de dados será criado no novo local e todas as informações atuais ficarão indisponíveis.",
         "Failed to move database": "Falha ao mover o banco de dados",
+        "Failed to open the database": "Falha ao abrir o banco de dados",
         "Database location updated successfully.": "Localização do banco de dados atualizada com sucesso.",
         "Error": "Erro",
         "Success": "Sucesso",
@@ -173,6 +187,18 @@ translations = {
         "Shortcut cannot be empty.": "O atalho não pode ficar vazio.",
         "Invalid shortcut format.": "Formato de atalho inválido.",
         "Shortcut already used by '{act}'.": "Atalho já usado por '{act}'.",
+        "Delete {count} tasks?": "Excluir {count} tarefas?",
+        "Attachments": "Anexos",
+        "Add Attachment": "Adicionar Anexo",
+        "Save Attachment": "Salvar Anexo",
+        "Delete Attachment": "Excluir Anexo",
+        "Search tasks": "Buscar tarefas",
+        "Failed to save changes": "Falha ao salvar as alterações",
+        "Failed to load tasks": "Falha ao carregar as tarefas",
+        "Failed to load projects": "Falha ao carregar os projetos",
+        "Export": "Exportar",
+        "Export tasks to CSV": "Exportar tarefas para CSV",
+        "Exported {count} tasks.": "{count} tarefas exportadas.",
     },
 }
 
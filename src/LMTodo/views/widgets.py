@@ -1,14 +1,15 @@
 from typing import Optional
 
-from PySide6.QtCore import QDate, QPoint, Qt
-from PySide6.QtGui import QBrush, QColor, QFont, QPainter, QPolygon
+from PySide6.QtCore import QDate, QPoint, Qt, QTimer
+from PySide6.QtGui import QBrush, QColor, QPainter, QPolygon
 from PySide6.QtWidgets import (
     QComboBox,
     QDateEdit,
-    QFrame,
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QListWidget,
+    QListWidgetItem,
     QPushButton,
     QSizePolicy,
     QTextEdit,
@@ -164,152 +165,12 @@ class TaskBubble(BubbleWidget):
         self.desc_input.returnPressed.connect(self.action_btn.click)
 
 
-class TaskWidget(QWidget):
-    def __init__(
-        self,
-        main_window,
-        project_name,
-        task_id,
-        description,
-        status,
-        due_date,
-        close_date,
-        creation_date,
-        comments=None,
-        on_save_comments=None,
-    ):
-        super().__init__()
-        layout = QVBoxLayout()
-
-        # Title/Description row with comment button at the end
-        title_row = QHBoxLayout()
-        title_label = QLabel(description)
-        title_label.setFont(QFont("Arial", 11, QFont.Bold))
-        title_label.setStyleSheet("color: #ffffff;")
-        title_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
-        title_row.addWidget(title_label)
-
-        # Comments button (opens CommentBubble)
-        comment_btn = QPushButton("💬")
-        comment_btn.setStyleSheet("QPushButton { color: green; }") if comments else None
-        comment_btn.setToolTip(translate("Comments"))
-        comment_btn.setMaximumWidth(36)
-        title_row.addWidget(comment_btn)
-        layout.addLayout(title_row)
-
-        # Dates and Status
-        dates_status_layout = QHBoxLayout()
-        dates_status_layout.setContentsMargins(
-            0, 0, 0, 0
-        )  # Reduce padding for this row
-        creation_date_label = QLabel(f"{translate('Created')}: {creation_date}")
-        creation_date_label.setAlignment(Qt.AlignCenter)
-        creation_date_label.setStyleSheet("color: #cccccc; padding: 0px 2px;")
-        due_date_label = QLabel(f"{translate('Due')}: {due_date}")
-        due_date_label.setAlignment(Qt.AlignCenter)
-
-        # Colorize due date based on on-time or overdue, using the same colors as the status field
-        if status == "open":
-            due_date_obj = QDate.fromString(due_date, "yyyy-MM-dd")
-            if due_date_obj < QDate.currentDate():
-                due_date_label.setStyleSheet(
-                    "color: #ff4444; padding: 0px 2px;"
-                )  # Overdue (red)
-            else:
-                due_date_label.setStyleSheet(
-                    "color: #ffaa00; padding: 0px 2px;"
-                )  # On time (yellow)
-        else:
-            due_date_label.setStyleSheet("color: #cccccc; padding: 0px 2px;")
-
-        close_date_label = QLabel(f"{translate('Closed')}: {close_date or ''}")
-        close_date_label.setAlignment(Qt.AlignCenter)
-
-        # Colorize close date based on adherence to due date if status is complete
-        if status == "complete" and close_date:
-            close_date_obj = QDate.fromString(close_date, "yyyy-MM-dd")
-            due_date_obj = QDate.fromString(due_date, "yyyy-MM-dd")
-            if close_date_obj <= due_date_obj:
-                close_date_label.setStyleSheet(
-                    "color: #00ff00; padding: 0px 2px;"
-                )  # On time (green)
-            else:
-                close_date_label.setStyleSheet(
-                    "color: #ff4444; padding: 0px 2px;"
-                )  # Late (red)
-        else:
-            close_date_label.setStyleSheet("color: #cccccc; padding: 0px 2px;")
-
-        status_label = QLabel(f"{translate('Status')}: {translate(status)}")
-        status_label.setAlignment(Qt.AlignCenter)
-        status_label.setStyleSheet(
-            "color: #00ff00; padding: 0px 2px;"
-            if status == "complete"
-            else "color: #ff4444; padding: 0px 2px;"
-            if status == "cancelled"
-            else "color: #ffaa00; padding: 0px 2px;"
-        )
-        project_name_label = QLabel(
-            project_name if len(project_name) <= 16 else project_name[:15]
-        )
-        project_name_label.setAlignment(Qt.AlignCenter)
-        project_name_label.setStyleSheet("color: #cccccc; padding: 0px 2px;")
-
-        dates_status_layout.addWidget(creation_date_label)
-        dates_status_layout.addWidget(due_date_label)
-        dates_status_layout.addWidget(close_date_label)
-        dates_status_layout.addWidget(status_label)
-        dates_status_layout.addWidget(project_name_label)
-        layout.addLayout(dates_status_layout)
-
-        # Separator
-        separator = QFrame()
-        separator.setStyleSheet("background-color: #cccccc;")
-        layout.addWidget(separator)
-
-        self.setLayout(layout)
-        self.setStyleSheet(
-            "background-color: #333333; border: 1px solid #555555; border-radius: 8px; padding: 10px;"
-        )
-
-        # Wire comment button to open bubble
-        def _open_comments():
-            def _save_and_refresh(text):
-                try:
-                    if callable(on_save_comments):
-                        on_save_comments(task_id, text)
-                except Exception:
-                    pass
-
-            # Build content as a QLayout (required by BubbleWidgetV2)
-            content_layout = QVBoxLayout()
-            comment_edit = QTextEdit()
-            comment_edit.setPlainText(comments or "")
-            comment_edit.setStyleSheet(
-                "background: #222; color: #f0f0f0; border-radius: 6px; padding: 6px;"
-            )
-            content_layout.addWidget(comment_edit)
-
-            # Create the new bubble variant using the layout content. Use top-right anchor
-            # to match prior placement (bubble's top-right aligns with button top-right).
-            cb = BubbleWidgetV2(
-                self,
-                main_window,
-                content_layout,
-                comment_btn,
-                anchor_point="top-right",
-                minWidth=840,
-                minHeight=173,
-                on_close=_save_and_refresh,
-            )
-            # Ensure bubble has the requested size before computing position
-            try:
-                cb.resize(cb.minimumWidth(), cb.minimumHeight())
-            except Exception:
-                pass
-            cb.show()
-
-        comment_btn.clicked.connect(_open_comments)
+def format_size(size):
+    """Return a byte count as a short human readable string."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
 
 
 class TaskFilterWidget(QWidget):
@@ -358,6 +219,18 @@ class TaskFilterWidget(QWidget):
             layout.addWidget(button)
             self.buttons[filter_name] = button
 
+        # Search box; the query runs once typing pauses instead of per keystroke
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText(translate("Search tasks"))
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setMinimumWidth(160)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(200)
+        self._search_timer.timeout.connect(on_filter_selected)
+        self.search_input.textChanged.connect(self._search_timer.start)
+        layout.addWidget(self.search_input)
+
         # Apply provided default filter
         if default_filter in self.buttons:
             self.buttons[default_filter].setChecked(True)
@@ -400,6 +273,9 @@ class TaskFilterWidget(QWidget):
             return self.sort_combo.currentData()
         return "creation"  # Default sort method
 
+    def get_search_text(self):
+        return self.search_input.text().strip()
+
 
 class BubbleWidgetV2(QWidget):
     """
@@ -558,3 +434,87 @@ class BubbleWidgetV2(QWidget):
                 )
             case _:
                 raise ValueError("Invalid side for anchor_point")
+
+
+class AttachmentBubble(BubbleWidgetV2):
+    """Bubble listing a task's attachments with add, save and delete buttons.
+
+    The bubble only handles presentation: the callbacks do the actual work and
+    call set_attachments() with fresh (id, filename, size) rows when done.
+    """
+
+    def __init__(
+        self,
+        main_window,
+        parent,
+        anchor_btn,
+        on_add=None,
+        on_save=None,
+        on_delete=None,
+    ):
+        content_layout = QVBoxLayout()
+        self.file_list = QListWidget()
+        self.file_list.setStyleSheet(
+            "background: #222; color: #f0f0f0; border-radius: 6px; padding: 6px;"
+        )
+        content_layout.addWidget(self.file_list)
+
+        btn_row = QHBoxLayout()
+        self.add_btn = QPushButton("+")
+        self.add_btn.setToolTip(translate("Add Attachment"))
+        self.save_btn = QPushButton("💾")
+        self.save_btn.setToolTip(translate("Save Attachment"))
+        self.delete_btn = QPushButton("🗑")
+        self.delete_btn.setToolTip(translate("Delete Attachment"))
+        btn_row.addWidget(self.add_btn)
+        btn_row.addWidget(self.save_btn)
+        btn_row.addWidget(self.delete_btn)
+        btn_row.addStretch(1)
+        content_layout.addLayout(btn_row)
+
+        super().__init__(
+            main_window,
+            parent,
+            content_layout,
+            anchor_btn,
+            anchor_point="top-right",
+            minWidth=420,
+            minHeight=220,
+        )
+
+        self._on_save = on_save
+        self._on_delete = on_delete
+        if callable(on_add):
+            self.add_btn.clicked.connect(on_add)
+        self.save_btn.clicked.connect(self._save_selected)
+        self.delete_btn.clicked.connect(self._delete_selected)
+        self.file_list.itemSelectionChanged.connect(self._set_buttons_state)
+        self._set_buttons_state()
+
+    def set_attachments(self, attachments):
+        """Show (id, filename, size) rows in the list."""
+        self.file_list.clear()
+        for file_id, filename, size in attachments:
+            item = QListWidgetItem(f"{filename} ({format_size(size)})")
+            item.setData(Qt.UserRole, (file_id, filename))
+            self.file_list.addItem(item)
+        self._set_buttons_state()
+
+    def _selected_attachment(self):
+        item = self.file_list.currentItem()
+        return item.data(Qt.UserRole) if item is not None else None
+
+    def _save_selected(self):
+        attachment = self._selected_attachment()
+        if attachment is not None and callable(self._on_save):
+            self._on_save(*attachment)
+
+    def _delete_selected(self):
+        attachment = self._selected_attachment()
+        if attachment is not None and callable(self._on_delete):
+            self._on_delete(attachment[0])
+
+    def _set_buttons_state(self):
+        has_selection = self.file_list.currentItem() is not None
+        self.save_btn.setEnabled(has_selection)
+        self.delete_btn.setEnabled(has_selection)
@@ -0,0 +1,130 @@
+import random
+from itertools import combinations
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+from LMTodo.views.task_list import TaskListModel, _increasing_subsequence
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def task(task_id, title=None):
+    return (
+        task_id,
+        title or f"task {task_id}",
+        "open",
+        "2024-01-01",
+        None,
+        None,
+        1,
+        "",
+    )
+
+
+def longest_increasing_length(values):
+    for length in range(len(values), 0, -1):
+        for picked in combinations(values, length):
+            if all(a < b for a, b in zip(picked, picked[1:])):
+                return length
+    return 0
+
+
+class RowRecorder:
+    """Replays the model's row signals on a copy of its rows, so a test can
+    check that the signals describe exactly how the rows changed."""
+
+    def __init__(self, model):
+        self.model = model
+        self.rows = [model.task(row) for row in range(model.rowCount())]
+        self.signals = []
+        model.rowsRemoved.connect(self.on_removed)
+        model.rowsInserted.connect(self.on_inserted)
+        model.rowsMoved.connect(self.on_moved)
+        model.dataChanged.connect(self.on_changed)
+        model.modelReset.connect(self.on_reset)
+
+    def on_removed(self, parent, first, last):
+        self.signals.append("remove")
+        del self.rows[first : last + 1]
+
+    def on_inserted(self, parent, first, last):
+        self.signals.append("insert")
+        self.rows[first:first] = [
+            self.model.task(row) for row in range(first, last + 1)
+        ]
+
+    def on_moved(self, parent, start, end, destination, row):
+        self.signals.append("move")
+        moved = self.rows[start : end + 1]
+        del self.rows[start : end + 1]
+        if row > start:
+            row -= len(moved)
+        self.rows[row:row] = moved
+
+    def on_changed(self, top_left, bottom_right, roles=()):
+        self.signals.append("change")
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.rows[row] = self.model.task(row)
+
+    def on_reset(self):
+        self.signals.append("reset")
+        self.rows = [self.model.task(row) for row in range(self.model.rowCount())]
+
+
+def test_increasing_subsequence_is_a_longest_one():
+    rng = random.Random(1)
+    for _ in range(300):
+        values = rng.sample(range(20), rng.randint(0, 9))
+        picked = _increasing_subsequence(values)
+        in_order = [value for value in values if value in picked]
+        assert in_order == sorted(in_order)
+        assert len(picked) == longest_increasing_length(values)
+
+
+def test_update_tasks_produces_the_target_rows():
+    rng = random.Random(2)
+    for _ in range(300):
+        old = [task(task_id) for task_id in rng.sample(range(40), rng.randint(0, 25))]
+        new = [
+            task(task_id, "edited" if rng.random() < 0.2 else None)
+            for task_id in rng.sample(range(40), rng.randint(0, 25))
+        ]
+        model = TaskListModel()
+        model.set_tasks(old)
+        recorder = RowRecorder(model)
+        assert model.update_tasks(new)
+        assert [model.task(row) for row in range(model.rowCount())] == new
+        assert recorder.rows == new
+        assert "reset" not in recorder.signals
+
+
+def test_update_tasks_touches_only_changed_rows():
+    tasks = [task(task_id) for task_id in range(1000)]
+    model = TaskListModel()
+    model.set_tasks(tasks)
+    recorder = RowRecorder(model)
+
+    edited = list(tasks)
+    edited[500] = task(500, "edited")
+    model.update_tasks(edited)
+    assert recorder.signals == ["change"]
+
+    recorder.signals.clear()
+    moved = edited[:10] + edited[11:600] + [edited[10]] + edited[600:]
+    model.update_tasks(moved)
+    assert recorder.signals == ["move"]
+    assert recorder.rows == moved
+
+
+def test_update_tasks_resets_past_max_moves():
+    tasks = [task(task_id) for task_id in range(TaskListModel.MAX_MOVES * 3)]
+    model = TaskListModel()
+    model.set_tasks(tasks)
+    recorder = RowRecorder(model)
+    assert not model.update_tasks(tasks[::-1])
+    assert recorder.signals == ["reset"]
+    assert recorder.rows == tasks[::-1]
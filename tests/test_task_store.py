@@ -0,0 +1,128 @@
+import random
+from datetime import date, timedelta
+
+from LMTodo.controllers.todo_controller import task_sort_key
+from LMTodo.models.task_store import TaskStore, date_ordinal
+
+TODAY = date(2026, 10, 18)
+FILTERS = ["All", "On Time", "Overdue", "Open", "Finished", "Cancelled"]
+
+
+def day(offset):
+    return (TODAY + timedelta(offset)).isoformat()
+
+
+def random_task(rng, task_id):
+    return (
+        task_id,
+        f"task {task_id}",
+        rng.choice(["open", "open", "complete", "cancelled"]),
+        "2026-01-01",
+        rng.choice([None, day(-30), day(-1), day(0), day(1), day(30)]),
+        None,
+        rng.randint(1, 3),
+        "",
+    )
+
+
+def matches(task, project_id, task_filter, today):
+    """Brute-force version of todo_controller.TASK_FILTERS, on ISO strings."""
+    _id, _title, status, _created, due_date, _closed, task_project = task[:7]
+    if project_id and task_project != project_id:
+        return False
+    if task_filter == "On Time":
+        return status == "open" and due_date is not None and due_date >= today
+    if task_filter == "Overdue":
+        return status == "open" and (due_date is None or due_date < today)
+    status_filters = {"Open": "open", "Finished": "complete", "Cancelled": "cancelled"}
+    if task_filter in status_filters:
+        return status == status_filters[task_filter]
+    return True
+
+
+def expected(tasks, project_id, task_filter, sort_method, today=TODAY):
+    selected = [
+        task
+        for task in tasks.values()
+        if matches(task, project_id, task_filter, today.isoformat())
+    ]
+    return sorted(selected, key=lambda task: task_sort_key(task, sort_method))
+
+
+def new_store(sort_method):
+    store = TaskStore(lambda task: task_sort_key(task, sort_method))
+    store.today = TODAY.toordinal()
+    return store
+
+
+def test_date_ordinal():
+    assert date_ordinal("2026-10-18") == TODAY.toordinal()
+    assert date_ordinal(None) is None
+    assert date_ordinal("") is None
+    assert date_ordinal("not a date") is None
+
+
+def test_select_matches_brute_force():
+    rng = random.Random(1)
+    tasks = {task_id: random_task(rng, task_id) for task_id in range(1, 301)}
+    for sort_method in ("creation", "due", "status"):
+        store = new_store(sort_method)
+        store.extend(rng.sample(list(tasks.values()), len(tasks)))
+        assert len(store) == len(tasks)
+        assert list(store) == expected(tasks, None, "All", sort_method)
+        for project_id in (None, 1, 2, 4):
+            for task_filter in FILTERS:
+                assert store.select(project_id, task_filter) == expected(
+                    tasks, project_id, task_filter, sort_method
+                )
+
+
+def test_put_and_remove_keep_the_indexes_in_sync():
+    rng = random.Random(2)
+    store = new_store("due")
+    tasks = {}
+    for _ in range(2000):
+        task_id = rng.randint(1, 60)
+        if rng.random() < 0.3:
+            assert store.remove(task_id) == tasks.pop(task_id, None)
+        else:
+            tasks[task_id] = random_task(rng, task_id)
+            store.put(tasks[task_id])
+        assert (task_id in store) == (task_id in tasks)
+    assert len(store) == len(tasks)
+    for task_id, task in tasks.items():
+        assert store.get(task_id) == task
+    for project_id in (None, 1, 2):
+        for task_filter in FILTERS:
+            assert store.select(project_id, task_filter) == expected(
+                tasks, project_id, task_filter, "due"
+            )
+
+
+def test_without_sort_key_tasks_keep_their_order():
+    store = TaskStore()
+    tasks = [(task_id, "", "open", "", None, None, 1, "") for task_id in (5, 2, 9)]
+    store.extend(tasks)
+    store.put(tasks[1][:1] + ("edited",) + tasks[1][2:])
+    assert [task[0] for task in store] == [5, 2, 9]
+    store.put((1, "", "open", "", None, None, 1, ""))
+    assert [task[0] for task in store] == [5, 2, 9, 1]
+
+
+def test_set_today_returns_only_the_tasks_that_fell_due():
+    store = new_store("creation")
+    due_today = (1, "", "open", "", day(0), None, 1, "")
+    due_tomorrow = (2, "", "open", "", day(1), None, 1, "")
+    closed_due_today = (3, "", "complete", "", day(0), day(0), 1, "")
+    already_overdue = (4, "", "open", "", day(-1), None, 1, "")
+    store.extend([due_today, due_tomorrow, closed_due_today, already_overdue])
+    assert store.select(task_filter="On Time") == [due_today, due_tomorrow]
+
+    assert store.set_today(TODAY.toordinal() + 1) == [due_today]
+    assert store.select(task_filter="On Time") == [due_tomorrow]
+    assert store.select(task_filter="Overdue") == [due_today, already_overdue]
+
+    assert store.set_today(TODAY.toordinal() + 1) == []
+    assert store.set_today(TODAY.toordinal() + 3) == [due_tomorrow]
+    assert store.set_today(TODAY.toordinal()) == []  # The clock went back
+    assert store.select(task_filter="On Time") == [due_today, due_tomorrow]